@@ -10,26 +10,38 @@ from config import (
     FOG_ADVISORY_FT, FOG_WARNING_FT, FOG_EMERGENCY_FT,
 )
 from models import SensorReading, Alert, AlertType, AlertSeverity
+from topology import intersection_id
 
 MAX_ALERTS = 50
 SUSTAIN_TICKS = 4  # condition must persist this many consecutive ticks (~12s at 3s/tick)
 
 
-def _group_intersections(readings: list[SensorReading]) -> list[dict]:
-    """Group sensors into intersections of 4 corners, return averaged values."""
-    sorted_r = sorted(readings, key=lambda r: r.node_id)
+def group_intersections(readings: list[SensorReading], topology=None) -> list[dict]:
+    """Group sensors into intersections of 4 corners, return averaged values.
+
+    With the topology the readings came from (so in node order), ids and
+    names come from its table instead of sorting and parsing node names.
+    """
+    if topology is not None and len(readings) == topology.n_nodes:
+        ordered = readings
+    else:
+        topology = None
+        ordered = sorted(readings, key=lambda r: r.node_id)
     groups = []
-    for i in range(0, len(sorted_r) - 3, 4):
-        corners = sorted_r[i:i + 4]
+    for i in range(0, len(ordered) - 3, 4):
+        corners = ordered[i:i + 4]
+        k = i // 4
         avg_temp = sum(c.temp_f for c in corners) / 4
         avg_hi = sum(c.heat_index_f for c in corners) / 4
         avg_vis = sum(c.visibility_ft for c in corners) / 4
-        # Use intersection name: strip the corner suffix (e.g. " — NW")
-        base_name = corners[0].name.rsplit(" — ", 1)[0] if " — " in corners[0].name else corners[0].name
-        # Use a stable intersection id from the first corner
-        int_id = f"int_{i // 4 + 1:02d}"
+        if topology is not None:
+            base_name = topology.intersection_name(k)
+        else:
+            # Use intersection name: strip the corner suffix (e.g. " — NW")
+            base_name = corners[0].name.rsplit(" — ", 1)[0] if " — " in corners[0].name else corners[0].name
         groups.append({
-            "int_id": int_id,
+            "int_id": intersection_id(k),
+            "index": k,
             "name": base_name,
             "temp_f": round(avg_temp, 1),
             "heat_index_f": round(avg_hi, 1),
@@ -85,8 +97,12 @@ class AlertEngine:
             alert.resolved_at = datetime.now(timezone.utc)
 
     def process(self, readings: list[SensorReading], tick: int = 0) -> list[Alert]:
-        intersections = _group_intersections(readings)
+        self.process_intersections(group_intersections(readings), tick)
+        return self.get_alerts()
 
+    def process_intersections(self, intersections: list[dict], tick: int = 0):
+        """Debounce and fire/resolve from pre-averaged intersection dicts
+        (int_id, name, heat_index_f, visibility_ft)."""
         for ix in intersections:
             int_id = ix["int_id"]
             name = ix["name"]
@@ -121,8 +137,6 @@ class AlertEngine:
                 self._resolve(int_id, AlertType.FOG_WARNING)
                 self._resolve(int_id, AlertType.FOG_EMERGENCY)
 
-        return self.get_alerts()
-
     def clear(self):
         for alert in self.active_alerts.values():
             alert.active = False
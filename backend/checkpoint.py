@@ -0,0 +1,196 @@
+"""Warm-restart checkpoints of drift, fog-weight, atmospheric, alert, region and subscriber state.
+
+File layout (little-endian):
+    header  "<4sHII"  magic, version, crc32(body), len(body)
+    body    zlib( "<I" meta_len | meta JSON | float64 node values )
+
+Node values are temp/humidity/vis per drifting node followed by the fog
+weights, in the id order listed in the meta JSON. Files are written to a
+temp name, fsynced, then renamed (and the directory fsynced so the rename
+itself is durable); a crash never leaves a torn checkpoint.
+"""
+
+import json
+import logging
+import os
+import struct
+import sys
+import zlib
+from array import array
+
+from config import CHECKPOINT_DIR, CHECKPOINT_KEEP
+from models import Alert, Subscriber
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"DMCK"
+VERSION = 4  # 2: atmospheric lattice in the meta; 3: subscribers; 4: hazard regions
+_HEADER = struct.Struct("<4sHII")
+_META_LEN = struct.Struct("<I")
+_SUFFIX = ".ckpt"
+
+
+def capture(state) -> dict:
+    """Copy the tick state. Cheap; call on the event loop between ticks."""
+    with state.lock:  # sync routes edit alerts and subscribers on other threads
+        return _capture(state)
+
+
+def _capture(state) -> dict:
+    engine, drift, subs = state.alert_engine, state.drift, state.subscribers
+    history_ids = {a.id for a in engine.alert_history}
+    return {
+        "tick": state.tick_count,
+        "scenario": state.scenario,
+        "last_scenario": drift.last_scenario,
+        "node_state": {nid: (s["temp"], s["humidity"], s["vis"]) for nid, s in drift.node_state.items()},
+        "fog_weights": dict(drift.fog_weights),
+        "field": {name: list(vals) for name, vals in state.field.values.items()},
+        "history": [a.model_dump(mode="json") for a in engine.alert_history],
+        # Active alerts not in history (trimmed past MAX_ALERTS) still need saving
+        "orphans": [a.model_dump(mode="json") for a in engine.active_alerts.values()
+                    if a.id not in history_ids],
+        "active": {key: a.id for key, a in engine.active_alerts.items()},
+        "pending": dict(engine._pending),
+        "regions": state.regions.snapshot(),
+        "subscribers": [{**sub.model_dump(mode="json"), "token": subs.tokens[sid]}
+                        for sid, sub in subs.subscribers.items()],
+        # Last intersection values, so restored subscribers re-open the
+        # alerts they had instead of waiting for the next crossing
+        "subscriber_last": dict(subs._last) if subs.subscribers else {},
+    }
+
+
+def encode(snap: dict) -> bytes:
+    node_ids = list(snap["node_state"])
+    fog_ids = list(snap["fog_weights"])
+    meta = {k: v for k, v in snap.items() if k not in ("node_state", "fog_weights")}
+    meta["node_ids"] = node_ids
+    meta["fog_ids"] = fog_ids
+    meta_bytes = json.dumps(meta, separators=(",", ":")).encode()
+
+    values = array("d")
+    for nid in node_ids:
+        values.extend(snap["node_state"][nid])
+    values.extend(snap["fog_weights"][nid] for nid in fog_ids)
+    if sys.byteorder == "big":
+        values.byteswap()
+
+    body = zlib.compress(_META_LEN.pack(len(meta_bytes)) + meta_bytes + values.tobytes(), 6)
+    return _HEADER.pack(MAGIC, VERSION, zlib.crc32(body), len(body)) + body
+
+
+def decode(blob: bytes) -> dict:
+    """Inverse of encode(). Raises ValueError on any corruption."""
+    if len(blob) < _HEADER.size:
+        raise ValueError("truncated header")
+    magic, version, crc, length = _HEADER.unpack_from(blob)
+    body = blob[_HEADER.size:]
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"unsupported checkpoint {magic!r} v{version}")
+    if len(body) != length or zlib.crc32(body) != crc:
+        raise ValueError("checksum mismatch")
+
+    raw = zlib.decompress(body)
+    (meta_len,) = _META_LEN.unpack_from(raw)
+    meta = json.loads(raw[_META_LEN.size:_META_LEN.size + meta_len])
+    values = array("d")
+    values.frombytes(raw[_META_LEN.size + meta_len:])
+    if sys.byteorder == "big":
+        values.byteswap()
+
+    node_ids, fog_ids = meta.pop("node_ids"), meta.pop("fog_ids")
+    if len(values) != 3 * len(node_ids) + len(fog_ids):
+        raise ValueError("node value count mismatch")
+    meta["node_state"] = {nid: tuple(values[3 * i:3 * i + 3]) for i, nid in enumerate(node_ids)}
+    offset = 3 * len(node_ids)
+    meta["fog_weights"] = {nid: values[offset + i] for i, nid in enumerate(fog_ids)}
+    return meta
+
+
+def _checkpoint_files(directory: str) -> list[str]:
+    """Checkpoint paths, newest tick first."""
+    try:
+        names = [n for n in os.listdir(directory) if n.endswith(_SUFFIX)]
+    except FileNotFoundError:
+        return []
+    return [os.path.join(directory, n) for n in sorted(names, reverse=True)]
+
+
+def _fsync_dir(directory: str):
+    """Flush a rename to disk. POSIX only; a no-op where directories can't be opened."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write(snap: dict, directory: str = CHECKPOINT_DIR):
+    """Atomically write a checkpoint and prune old ones. Blocking — run off the loop."""
+    try:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"tick_{snap['tick']:010d}{_SUFFIX}")
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(encode(snap))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        _fsync_dir(directory)
+        for old in _checkpoint_files(directory)[CHECKPOINT_KEEP:]:
+            os.remove(old)
+    except OSError as exc:
+        logger.warning("Checkpoint write failed: %s", exc)
+
+
+def load_latest(directory: str = CHECKPOINT_DIR) -> dict | None:
+    """Newest checkpoint that decodes cleanly, or None."""
+    for path in _checkpoint_files(directory):
+        try:
+            with open(path, "rb") as f:
+                return decode(f.read())
+        except (OSError, ValueError, zlib.error) as exc:
+            logger.warning("Skipping bad checkpoint %s: %s", path, exc)
+    return None
+
+
+def restore(state, directory: str = CHECKPOINT_DIR) -> bool:
+    """Load the newest valid checkpoint into `state` and its sensor drift."""
+    snap = load_latest(directory)
+    if snap is None:
+        return False
+
+    drift = state.drift
+    drift.node_state = {nid: {"temp": t, "humidity": h, "vis": v} for nid, (t, h, v) in snap["node_state"].items()}
+    drift.fog_weights = dict(snap["fog_weights"])
+    drift.last_scenario = snap["last_scenario"]
+    field = snap.get("field")
+    if field and len(next(iter(field.values()), [])) == state.field.rows * state.field.cols:
+        state.field.values = field
+
+    # Active alerts must be the same objects as their history entries so
+    # resolving one also marks it resolved in history.
+    engine = state.alert_engine
+    engine.alert_history = [Alert.model_validate(a) for a in snap["history"]]
+    by_id = {a.id: a for a in engine.alert_history}
+    by_id.update({a["id"]: Alert.model_validate(a) for a in snap["orphans"]})
+    engine.active_alerts = {key: by_id[aid] for key, aid in snap["active"].items() if aid in by_id}
+    engine._pending = dict(snap["pending"])
+    state.regions.restore(snap["regions"])
+
+    subs = state.subscribers
+    subs._last = {int_id: tuple(v) for int_id, v in snap["subscriber_last"].items()}
+    for raw in snap["subscribers"]:
+        token = raw.pop("token")
+        subs.register(Subscriber.model_validate(raw), token, snap["tick"])  # fresh lease
+
+    state.scenario = snap["scenario"]
+    state.tick_count = snap["tick"]
+    logger.info("Restored checkpoint at tick %d (%s)", snap["tick"], snap["scenario"])
+    return True
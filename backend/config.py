@@ -1,58 +1,34 @@
 """Davis geography, thresholds, and weights."""
 
+import os
+
 # Downtown Davis grid: B–G St (west→east) × 2nd–5th St (south→north)
 # Dense grid includes mid-block sensor points between each street pair.
 # Anchor: 2nd & B = (38.5427, -121.7440) from OSM
 # Block vectors derived from user-supplied block corners:
 #   North (per numbered street): lat +0.001280, lng -0.000350
 #   East  (per lettered street): lat +0.000189, lng +0.001103
-_ANCHOR = (38.5431, -121.7437)
+# Node geometry is built from this definition on first use (see topology.py).
 _NORTH = (0.001280, -0.000350)   # 2nd→3rd, 3rd→4th, 4th→5th
-_EAST = (0.000189, 0.001103)     # B→C, C→D, D→E, E→F, F→G
-
-_STREETS_NS = ["B", "C", "D", "E", "F", "G"]   # cols 0-5
-
-# 8 rows: original 4 streets + 3 mid-block rows + 1 north extension
-# Row step uses half the _NORTH vector for mid-block points
-_ROW_DEFS = [
-    ("2nd",     0.0),
-    ("2nd-3rd", 0.5),
-    ("3rd",     1.0),
-    ("3rd-4th", 1.5),
-    ("4th",     2.0),
-    ("4th-5th", 2.5),
-    ("5th",     3.0),
-    ("5th-6th", 3.5),
-]
-
-GRID_COLS = len(_STREETS_NS)  # 6
-GRID_ROWS = len(_ROW_DEFS)    # 8
 
-_CENTERS = []
-for _ew, _r in _ROW_DEFS:
-    for _c, _ns in enumerate(_STREETS_NS):
-        _lat = round(_ANCHOR[0] + _r * _NORTH[0] + _c * _EAST[0], 6)
-        _lng = round(_ANCHOR[1] + _r * _NORTH[1] + _c * _EAST[1], 6)
-        _CENTERS.append((f"{_ew} & {_ns} St", _lat, _lng, "downtown"))
-
-# Intersection corner offsets (~15 m, tight clustering)
-_OFFSETS = [
-    ("NW", +0.00013, -0.00017),
-    ("NE", +0.00013, +0.00017),
-    ("SW", -0.00013, -0.00017),
-    ("SE", -0.00013, +0.00017),
-]
+DAVIS_GRID = {
+    "name": "davis-downtown",
+    "anchor": (38.5431, -121.7437),
+    # 8 rows: original 4 streets + 3 mid-block rows + 1 north extension,
+    # so one row step is half a block north
+    "north": (_NORTH[0] * 0.5, _NORTH[1] * 0.5),
+    "east": (0.000189, 0.001103),    # B→C, C→D, D→E, E→F, F→G
+    "rows": ["2nd", "2nd-3rd", "3rd", "3rd-4th", "4th", "4th-5th", "5th", "5th-6th"],
+    "cols": ["B St", "C St", "D St", "E St", "F St", "G St"],
+    "default_zone": "downtown",
+}
 
-INTERSECTIONS = []
-for _i, (name, lat, lng, zone) in enumerate(_CENTERS, start=1):
-    for _j, (corner, dlat, dlng) in enumerate(_OFFSETS, start=1):
-        INTERSECTIONS.append({
-            "id": f"node_{(_i - 1) * 4 + _j:03d}",
-            "name": f"{name} — {corner}",
-            "lat": round(lat + dlat, 4),
-            "lng": round(lng + dlng, 4),
-            "zone": zone,
-        })
+# Optional JSON grid definition replacing the Davis grid (format in topology.py)
+GRID_FILE = os.environ.get("GRID_FILE")
+MAX_GRID_NODES = 1_000_000
+# Generated instance grids tick in-process on the shared executor; one huge
+# grid would stall every instance's scheduler round
+MAX_INSTANCE_NODES = 20_000
 
 # Thresholds (Fahrenheit / feet)
 HEAT_ADVISORY_F = 105
@@ -61,11 +37,48 @@ FOG_ADVISORY_FT = 500
 FOG_WARNING_FT = 200
 FOG_EMERGENCY_FT = 50
 
+# Hazard regions: adjacent intersections at or past these limits cluster into
+# one region; regions this large raise a single region alert for all members
+REGION_HEAT_F = HEAT_ADVISORY_F
+REGION_FOG_FT = FOG_ADVISORY_FT
+REGION_MIN_CELLS = 3
+
+# Personal alerts: how far a 0-100 profile weight moves a subscriber's limits.
+# Full heat sensitivity lowers the heat limit 10°F; full fog sensitivity
+# doubles the visibility distance that counts as "too foggy".
+PERSONAL_HEAT_SHIFT_F = 0.1
+PERSONAL_FOG_SCALE = 0.01
+# Subscribers with no open WebSocket and no token-checked read for this many
+# ticks are dropped (~5 min at 3s/tick), so closed tabs don't pile up
+SUBSCRIBER_IDLE_TICKS = 100
+
 # Risk fusion weights
 WEIGHT_SENSOR_HEAT = 0.35
 WEIGHT_SENSOR_FOG = 0.35
 WEIGHT_SORCERER_PRIOR = 0.30
 
+# Sorcerer atmospheric lattice (coarse; nodes sample it bilinearly)
+FIELD_ROWS = 4
+FIELD_COLS = 5
+
+# Worker processes for the sharded engine (0 = single-process simulation)
+SIM_SHARDS = int(os.environ.get("SIM_SHARDS", "0"))
+# Sharded mode builds reading / risk models only for this many of the
+# riskiest intersections plus those under an alert (the API serves these)
+SHARD_SERVE_INTERSECTIONS = int(os.environ.get("SHARD_SERVE_INTERSECTIONS", "1000"))
+# Threads in the executor shared by every simulation instance's tick
+SIM_WORKERS = int(os.environ.get("SIM_WORKERS", "4"))
+
+# Warm-restart checkpoints (~15s at 3s/tick)
+CHECKPOINT_DIR = os.environ.get("CHECKPOINT_DIR", "checkpoints")
+CHECKPOINT_EVERY_TICKS = 5
+CHECKPOINT_KEEP = 3
+
+# Append-only tick log (replay + export)
+TICK_LOG_ENABLED = os.environ.get("TICK_LOG", "1") != "0"
+TICK_LOG_DIR = os.environ.get("TICK_LOG_DIR", "ticklog")
+TICK_LOG_SEGMENT_BYTES = 64 * 1024 * 1024
+
 # Scenario presets
 SCENARIOS = {
     "clear_day": {
@@ -101,4 +114,7 @@ SCENARIOS = {
 "live": {
         "description": "Real-time Davis weather from WeatherAPI.com",
     },
+    "replay": {
+        "description": "Replay recorded ticks from the tick log",
+    },
 }
@@ -0,0 +1,476 @@
+"""Hazard regions: connected clusters of adjacent intersections past a limit.
+
+For each hazard, intersections at or past the region limit are grouped into
+4-connected regions on the topology grid. Membership is kept up to date
+incrementally with a union-find. A cell that crosses the limit is unioned with
+its active neighbours in near-constant time. A cell that clears is checked
+against its 3x3 neighbourhood. If that shows it cannot disconnect its region, it
+is simply dropped. Otherwise searches from its neighbours relabel only the
+pieces that break away, because union-find cannot split.
+
+Each region's scan (peak and extent) is cached until it goes dirty: its
+membership changed, a member rose past its peak, or the peak cell itself
+moved. Only dirty regions are rescanned and have their alert rebuilt. So a
+tick costs one flat pass over the values, plus work proportional to the
+cells that changed and the regions they touched.
+
+A region with REGION_MIN_CELLS members that persists for SUSTAIN_TICKS raises
+a single region alert carrying its extent, peak and member count. That alert
+replaces the per-intersection alerts of its members in the alert feed.
+"""
+
+import uuid
+from array import array
+from collections import deque
+from datetime import datetime, timezone
+
+from alert_engine import MAX_ALERTS, SUSTAIN_TICKS
+from config import (
+    HEAT_WARNING_F, FOG_WARNING_FT, FOG_EMERGENCY_FT,
+    REGION_HEAT_F, REGION_FOG_FT, REGION_MIN_CELLS,
+)
+from models import Alert, AlertSeverity, AlertType, HazardRegion, RegionExtent
+from topology import CORNERS, Topology, intersection_id
+
+
+# The 8 ring cells around a cell in cyclic order, as (drow, dcol);
+# consecutive entries are 4-adjacent to each other.
+_RING = ((1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1))
+
+
+class _RegionSet:
+    """Union-find over the active cells of one hazard.
+
+    Each activation of a cell gets a fresh union-find slot, so a cell that
+    clears can stay behind as an inert path node instead of forcing a
+    rebuild. Only roots carry region data: member cells, stable region id
+    and the tick the region was born. On a merge the larger region keeps its
+    id. On a split the pieces that break away get new ids.
+    """
+
+    def __init__(self, hazard: str, topology: Topology):
+        n = topology.n_intersections
+        self.hazard = hazard
+        self.rows, self.cols = topology.rows, topology.cols
+        self.col = topology.col
+        self.active = bytearray(n)
+        self.values = array("d", bytes(8 * n))
+        self.slot = array("i", range(n))  # cell -> its current union-find slot
+        self.parent = array("i", range(n))  # slot -> parent slot
+        self.members: dict[int, set[int]] = {}  # root slot -> cells
+        self.region_id: dict[int, str] = {}
+        self.born: dict[int, int] = {}
+        self.scanned: dict[int, tuple] = {}  # root slot -> scan(); absent = dirty
+        self.is_peak = bytearray(n)  # cell is the peak of a cached scan
+        self._seq = 0
+
+    def _new_id(self) -> str:
+        self._seq += 1
+        return f"{self.hazard}_region_{self._seq}"
+
+    def find(self, k: int) -> int:
+        """Root slot of active cell k."""
+        parent = self.parent
+        x = self.slot[k]
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]  # path halving
+            x = parent[x]
+        return x
+
+    def _neighbours(self, k: int):
+        r, c = divmod(k, self.cols)
+        if r > 0:
+            yield k - self.cols
+        if r < self.rows - 1:
+            yield k + self.cols
+        if c > 0:
+            yield k - 1
+        if c < self.cols - 1:
+            yield k + 1
+
+    def _is_simple(self, k: int) -> bool:
+        """True if clearing k cannot disconnect its region: its active
+        4-neighbours all lie on one unbroken run of active ring cells, so
+        any path through k can step around it instead."""
+        r, c = divmod(k, self.cols)
+        rows, cols, active = self.rows, self.cols, self.active
+        ring = [
+            0 <= r + dr < rows and 0 <= c + dc < cols and active[(r + dr) * cols + c + dc]
+            for dr, dc in _RING
+        ]
+        if all(ring):
+            return True
+        # Walk the ring once from an inactive cell, counting runs of active
+        # cells that contain a 4-neighbour (even ring positions)
+        start = ring.index(False)
+        runs, touches = 0, False
+        for j in range(start + 1, start + 9):
+            if ring[j % 8]:
+                touches = touches or j % 2 == 0
+            else:
+                runs += touches
+                touches = False
+        return runs <= 1
+
+    def worse(self, a: float, b: float) -> bool:
+        """True if value a is further past the limit than b."""
+        return a > b if self.hazard == "heat" else a < b
+
+    def _forget(self, root: int):
+        cached = self.scanned.pop(root, None)
+        if cached is not None:
+            self.is_peak[cached[1]] = 0
+
+    def _union(self, a: int, b: int):
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return
+        self._forget(ra)
+        self._forget(rb)
+        if len(self.members[ra]) < len(self.members[rb]):
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        self.members[ra] |= self.members.pop(rb)
+        self.region_id.pop(rb)
+        self.born[ra] = min(self.born[ra], self.born.pop(rb))
+
+    def _break_off(self, root: int, piece: list[int]):
+        # Fresh slots for the piece: cells staying behind may still route
+        # through its old ones on their way to the root
+        new_root = len(self.parent)
+        self.parent.extend(array("i", [new_root]) * len(piece))
+        for j, k in enumerate(piece):
+            self.slot[k] = new_root + j
+        self.members[root].difference_update(piece)
+        self.members[new_root] = set(piece)
+        self.region_id[new_root] = self._new_id()
+        self.born[new_root] = self.born[root]
+
+    def _split(self, root: int, seeds: list[int]):
+        """Break off the pieces of a region that came apart around cleared cells.
+
+        Grows one BFS per seed in lockstep, merging searches that meet. A
+        search that runs dry has traced a whole piece, which breaks away;
+        once one search is left the rest stays with the root. The work is
+        proportional to the pieces that break away, not to the region.
+        """
+        active = self.active
+        owner = {s: i for i, s in enumerate(seeds)}  # cell -> search that reached it
+        group = list(range(len(seeds)))  # search -> search it merged into
+        frontier = {i: deque([s]) for i, s in enumerate(seeds)}
+        cells = {i: [s] for i, s in enumerate(seeds)}
+        while len(frontier) > 1:
+            for i in list(frontier):
+                if i not in frontier:
+                    continue  # merged away this round
+                queue = frontier[i]
+                if not queue:
+                    del frontier[i]
+                    self._break_off(root, cells.pop(i))
+                    if len(frontier) == 1:
+                        break
+                    continue
+                for nb in self._neighbours(queue.popleft()):
+                    if not active[nb]:
+                        continue
+                    j = owner.get(nb)
+                    if j is None:
+                        owner[nb] = i
+                        queue.append(nb)
+                        cells[i].append(nb)
+                        continue
+                    while group[j] != j:
+                        j = group[j]
+                    if j != i:
+                        group[j] = i
+                        queue.extend(frontier.pop(j))
+                        cells[i].extend(cells.pop(j))
+
+    def _compact(self):
+        """Renumber slots once inert ones dominate: one slot per cell again."""
+        # Old root slots and new root cells share one number space, so build
+        # fresh tables rather than re-keying the live ones
+        parent = array("i", range(len(self.active)))
+        members, region_id, born = {}, {}, {}
+        for root, cells in self.members.items():
+            new_root = next(iter(cells))
+            for k in cells:
+                parent[k] = new_root
+            members[new_root] = cells
+            region_id[new_root] = self.region_id[root]
+            born[new_root] = self.born[root]
+        self.parent = parent
+        self.members, self.region_id, self.born = members, region_id, born
+        self.slot = array("i", range(len(self.active)))
+        self.scanned.clear()
+        self.is_peak = bytearray(len(self.active))
+
+    def apply(self, added: list[int], cleared: list[int], moved: list[int], tick: int):
+        """Fold in cells that crossed the limit either way, and mark dirty
+        the regions of `moved` members that may have changed their peak."""
+        for k in moved:
+            root = self.find(k)
+            cached = self.scanned.get(root)
+            if cached is not None and (k == cached[1] or self.worse(self.values[k], cached[0])):
+                self._forget(root)
+
+        for k in cleared:
+            root = self.find(k)
+            self._forget(root)
+            simple = self._is_simple(k)
+            self.active[k] = 0
+            members = self.members[root]
+            members.discard(k)
+            if not members:
+                self.members.pop(root)
+                self.region_id.pop(root)
+                self.born.pop(root)
+            elif not simple:
+                # Clears are applied one at a time, so the region was whole
+                # before this one and any piece it left touches a neighbour
+                seeds = [nb for nb in self._neighbours(k) if self.active[nb]]
+                if len(seeds) > 1:
+                    self._split(root, seeds)
+
+        for k in added:
+            self.active[k] = 1
+            x = len(self.parent)
+            self.parent.append(x)
+            self.slot[k] = x
+            self.members[x] = {k}
+            self.region_id[x] = self._new_id()
+            self.born[x] = tick
+            for nb in self._neighbours(k):
+                if self.active[nb]:
+                    self._union(k, nb)
+        if len(self.parent) > 4 * len(self.active):
+            self._compact()
+
+    def snapshot(self) -> dict:
+        """Regions as [id, born tick, cells, cell values], for checkpoints."""
+        values = self.values
+        return {
+            "seq": self._seq,
+            "regions": [[self.region_id[root], self.born[root], sorted(cells), [values[k] for k in sorted(cells)]]
+                        for root, cells in self.members.items()],
+        }
+
+    def restore(self, snap: dict):
+        """Inverse of snapshot(), onto an empty set: one slot per cell again."""
+        for rid, born, cells, values in snap["regions"]:
+            root = cells[0]
+            for k, v in zip(cells, values):
+                self.active[k] = 1
+                self.values[k] = v
+                self.parent[k] = root
+            self.members[root] = set(cells)
+            self.region_id[root] = rid
+            self.born[root] = born
+        self._seq = snap["seq"]
+
+    def scan(self, root: int) -> tuple[float, int, tuple[int, int, int, int]]:
+        """(worst value, its cell, (row_min, row_max, col_min, col_max)),
+        cached until the region goes dirty."""
+        cached = self.scanned.get(root)
+        if cached is not None:
+            return cached
+        cells = self.members[root]
+        peak_k = (max if self.hazard == "heat" else min)(cells, key=self.values.__getitem__)
+        # Cells are row-major, so the lowest and highest index give the row span
+        col = map(self.col.__getitem__, cells)
+        c0 = min(col)
+        col = map(self.col.__getitem__, cells)
+        result = (self.values[peak_k], peak_k,
+                  (min(cells) // self.cols, max(cells) // self.cols, c0, max(col)))
+        self.scanned[root] = result
+        self.is_peak[peak_k] = 1
+        return result
+
+
+def _classify(hazard: str, peak: float) -> tuple[AlertType, AlertSeverity]:
+    if hazard == "heat":
+        if peak >= HEAT_WARNING_F:
+            return AlertType.HEAT_WARNING, AlertSeverity.WARNING
+        return AlertType.HEAT_ADVISORY, AlertSeverity.ADVISORY
+    if peak <= FOG_EMERGENCY_FT:
+        return AlertType.FOG_EMERGENCY, AlertSeverity.EMERGENCY
+    if peak <= FOG_WARNING_FT:
+        return AlertType.FOG_WARNING, AlertSeverity.WARNING
+    return AlertType.FOG_ADVISORY, AlertSeverity.ADVISORY
+
+
+class HazardRegions:
+    def __init__(self, topology: Topology):
+        self.topology = topology
+        self.heat = _RegionSet("heat", topology)
+        self.fog = _RegionSet("fog", topology)
+        self.active_alerts: dict[str, Alert] = {}  # region id -> alert
+        self.alert_history: list[Alert] = []
+
+    def update(self, intersections: list[dict], tick: int = 0):
+        """Fold one tick of intersection averages into the regions, then
+        fire, refresh or resolve region alerts."""
+        heat, fog = self.heat, self.fog
+        heat_on, fog_on = heat.active, fog.active
+        heat_vals, fog_vals = heat.values, fog.values
+        heat_peak, fog_peak = heat.is_peak, fog.is_peak
+        heat_add, heat_clear, heat_moved = [], [], []
+        fog_add, fog_clear, fog_moved = [], [], []
+        for ix in intersections:
+            k = ix["index"]
+            hi, vis = ix["heat_index_f"], ix["visibility_ft"]
+            # A member that stays in can only move its region's peak by
+            # rising past it, or by being the peak
+            if hi >= REGION_HEAT_F:
+                if not heat_on[k]:
+                    heat_add.append(k)
+                elif hi > heat_vals[k] or (heat_peak[k] and hi != heat_vals[k]):
+                    heat_moved.append(k)
+            elif heat_on[k]:
+                heat_clear.append(k)
+            if vis <= REGION_FOG_FT:
+                if not fog_on[k]:
+                    fog_add.append(k)
+                elif vis < fog_vals[k] or (fog_peak[k] and vis != fog_vals[k]):
+                    fog_moved.append(k)
+            elif fog_on[k]:
+                fog_clear.append(k)
+            heat_vals[k] = hi
+            fog_vals[k] = vis
+        heat.apply(heat_add, heat_clear, heat_moved, tick)
+        fog.apply(fog_add, fog_clear, fog_moved, tick)
+
+        live: set[str] = set()
+        for rs in (heat, fog):
+            for root, members in rs.members.items():
+                if len(members) < REGION_MIN_CELLS or tick - rs.born[root] < SUSTAIN_TICKS:
+                    continue
+                rid = rs.region_id[root]
+                live.add(rid)
+                # Clean regions keep their alert (and its models) as they are
+                if root not in rs.scanned or rid not in self.active_alerts:
+                    self._alert(rs, root, rid)
+        for rid in [rid for rid in self.active_alerts if rid not in live]:
+            alert = self.active_alerts.pop(rid)
+            alert.active = False
+            alert.resolved_at = datetime.now(timezone.utc)
+
+    def _region(self, rs: _RegionSet, root: int, members: bool = False, scan=None) -> HazardRegion:
+        topo = self.topology
+        peak, peak_k, (r0, r1, c0, c1) = scan or rs.scan(root)
+        # Lat/lng bounds from the corner nodes of the bounding box's corner cells
+        lats, lngs = [], []
+        for r in (r0, r1):
+            for c in (c0, c1):
+                i = (r * topo.cols + c) * CORNERS
+                lats.extend(topo.lat[i:i + CORNERS])
+                lngs.extend(topo.lng[i:i + CORNERS])
+        return HazardRegion(
+            id=rs.region_id[root],
+            hazard=rs.hazard,
+            member_count=len(rs.members[root]),
+            peak_value=round(peak, 1),
+            peak_int_id=intersection_id(peak_k),
+            extent=RegionExtent(
+                row_min=r0, row_max=r1, col_min=c0, col_max=c1,
+                lat_min=min(lats), lat_max=max(lats), lng_min=min(lngs), lng_max=max(lngs),
+            ),
+            members=sorted(intersection_id(k) for k in rs.members[root]) if members else [],
+        )
+
+    def _alert(self, rs: _RegionSet, root: int, rid: str):
+        scan = rs.scan(root)
+        region = self._region(rs, root, scan=scan)
+        alert_type, severity = _classify(rs.hazard, region.peak_value)
+        peak_k = scan[1]
+        name = f"{region.member_count} intersections around {self.topology.intersection_name(peak_k)}"
+        if rs.hazard == "heat":
+            message = (f"{alert_type.value.replace('_', ' ').title()} region: {name}, "
+                       f"peak heat index {region.peak_value:.0f}°F")
+        else:
+            message = (f"{alert_type.value.replace('_', ' ').title()} region: {name}, "
+                       f"visibility down to {region.peak_value:.0f}ft")
+
+        alert = self.active_alerts.get(rid)
+        if alert is None:
+            alert = Alert(
+                id=str(uuid.uuid4())[:8],
+                node_id=rid,
+                node_name=name,
+                alert_type=alert_type,
+                severity=severity,
+                message=message,
+                active=True,
+                timestamp=datetime.now(timezone.utc),
+                region=region,
+            )
+            self.active_alerts[rid] = alert
+            self.alert_history.append(alert)
+            if len(self.alert_history) > MAX_ALERTS:
+                self.alert_history = self.alert_history[-MAX_ALERTS:]
+        else:
+            # Same alert object, refreshed as the region grows, shrinks or worsens
+            alert.node_name, alert.alert_type, alert.severity = name, alert_type, severity
+            alert.message, alert.region = message, region
+
+    def regions(self, min_cells: int = REGION_MIN_CELLS, members: bool = False) -> list[HazardRegion]:
+        """Current regions of at least `min_cells`, largest first."""
+        out = [
+            self._region(rs, root, members)
+            for rs in (self.heat, self.fog)
+            for root, cells in rs.members.items() if len(cells) >= min_cells
+        ]
+        return sorted(out, key=lambda r: r.member_count, reverse=True)
+
+    def filter_alerts(self, alerts: list[Alert]) -> list[Alert]:
+        """Region alerts plus the intersection alerts no active region covers."""
+        kept = []
+        for a in alerts:
+            rs = self.heat if a.alert_type.value.startswith("heat") else self.fog
+            k = int(a.node_id[4:]) - 1  # "int_NN"
+            if (0 <= k < len(rs.active) and rs.active[k]
+                    and rs.region_id[rs.find(k)] in self.active_alerts):
+                continue
+            kept.append(a)
+        recent_resolved = [a for a in self.alert_history if not a.active][-10:]
+        merged = kept + list(self.active_alerts.values()) + recent_resolved
+        return sorted(merged, key=lambda a: a.timestamp, reverse=True)
+
+    def snapshot(self) -> dict:
+        """Regions and their alerts, for checkpoints (see checkpoint.capture)."""
+        history_ids = {a.id for a in self.alert_history}
+        return {
+            "heat": self.heat.snapshot(),
+            "fog": self.fog.snapshot(),
+            "history": [a.model_dump(mode="json") for a in self.alert_history],
+            "orphans": [a.model_dump(mode="json") for a in self.active_alerts.values()
+                        if a.id not in history_ids],
+            "active": {rid: a.id for rid, a in self.active_alerts.items()},
+        }
+
+    def restore(self, snap: dict):
+        """Inverse of snapshot(). Regions keep their ids and born ticks, so
+        sustained ones keep covering their members' alerts."""
+        n = self.topology.n_intersections
+        if any(k >= n for rs in ("heat", "fog") for region in snap[rs]["regions"] for k in region[2]):
+            return  # saved for another grid; regions rebuild from the next tick
+        self.heat = _RegionSet("heat", self.topology)
+        self.fog = _RegionSet("fog", self.topology)
+        self.heat.restore(snap["heat"])
+        self.fog.restore(snap["fog"])
+        # Active alerts are their history entries, as in checkpoint.restore
+        self.alert_history = [Alert.model_validate(a) for a in snap["history"]]
+        by_id = {a.id: a for a in self.alert_history}
+        by_id.update({a["id"]: Alert.model_validate(a) for a in snap["orphans"]})
+        self.active_alerts = {rid: by_id[aid] for rid, aid in snap["active"].items() if aid in by_id}
+
+    def clear(self):
+        """Drop region alerts and regions; they rebuild (and re-debounce) from the next tick."""
+        now = datetime.now(timezone.utc)
+        for alert in self.active_alerts.values():
+            alert.active = False
+            alert.resolved_at = now
+        self.active_alerts.clear()
+        self.alert_history.clear()
+        self.heat = _RegionSet("heat", self.topology)
+        self.fog = _RegionSet("fog", self.topology)
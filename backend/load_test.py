@@ -0,0 +1,271 @@
+"""Local load generator for the dashboard backend.
+
+Opens many `/ws/live` clients plus a mix of REST pollers, then reports
+tick-to-client latency, message loss, and server CPU / RSS as JSON.
+
+    python load_test.py --clients 2000 --pollers 50 --duration 60
+    python load_test.py --url http://127.0.0.1:8000 --server-pid 1234
+
+Without --url the app is started in-process on a free local port (so the
+CPU / RSS numbers include the load generator itself). With --url, pass
+--server-pid to sample the server process from /proc.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import socket
+import sys
+import time
+from datetime import datetime
+
+import httpx
+import websockets
+
+POLL_PATHS = ["/api/risk-map", "/api/top-risk", "/api/alerts"]
+
+
+def _percentile(values: list[float], pct: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return round(ordered[idx], 2)
+
+
+def _summarize(values: list[float]) -> dict:
+    return {
+        "count": len(values),
+        "p50": _percentile(values, 50),
+        "p90": _percentile(values, 90),
+        "p99": _percentile(values, 99),
+        "max": round(max(values), 2) if values else None,
+    }
+
+
+def _proc_sample(pid: int) -> dict | None:
+    """CPU seconds and RSS for `pid` from /proc (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/status") as f:
+            rss_kb = next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+    except (OSError, StopIteration, IndexError, ValueError):
+        return None
+    ticks = os.sysconf("SC_CLK_TCK")
+    # utime and stime are fields 14 and 15; fields[] starts at field 3
+    cpu_s = (int(fields[11]) + int(fields[12])) / ticks
+    return {"cpu_s": cpu_s, "rss_mb": rss_kb / 1024}
+
+
+def _raise_fd_limit(needed: int):
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < needed:
+        target = needed if hard == resource.RLIM_INFINITY else min(hard, needed)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class Stats:
+    def __init__(self):
+        self.latencies_ms: list[float] = []
+        self.ws_connected = 0
+        self.ws_failed = 0
+        self.ws_dropped = 0
+        self.ws_received = 0
+        self.ws_expected = 0
+        self.poll_latencies_ms: dict[str, list[float]] = {p: [] for p in POLL_PATHS}
+        self.poll_errors = 0
+        self.resource_samples: list[dict] = []
+
+
+async def ws_client(url: str, stats: Stats, stop: asyncio.Event, connect_sem: asyncio.Semaphore):
+    first_tick = last_tick = None
+    received = 0
+    try:
+        async with connect_sem:
+            conn = await websockets.connect(url, max_size=None, open_timeout=30)
+    except Exception:
+        stats.ws_failed += 1
+        return
+    stats.ws_connected += 1
+    try:
+        while not stop.is_set():
+            try:
+                raw = await asyncio.wait_for(conn.recv(), timeout=1)
+            except asyncio.TimeoutError:
+                continue
+            now = time.time()
+            msg = json.loads(raw)
+            tick = msg.get("tick")
+            if tick is None:
+                continue
+            # Snapshot timestamp is when the tick was computed, not when the
+            # (cached) payload was serialized
+            sent = datetime.fromisoformat(msg["timestamp"]).timestamp()
+            # The initial snapshot on connect is not a broadcast; skip it for latency
+            if first_tick is not None:
+                stats.latencies_ms.append((now - sent) * 1000)
+            else:
+                first_tick = tick
+            last_tick = tick
+            received += 1
+    except websockets.ConnectionClosed:
+        stats.ws_dropped += 1
+    finally:
+        await conn.close()
+        if first_tick is not None:
+            stats.ws_received += received
+            stats.ws_expected += last_tick - first_tick + 1
+
+
+async def poller(base: str, stats: Stats, stop: asyncio.Event, interval: float, client: httpx.AsyncClient):
+    # Stagger start so pollers don't all fire in lockstep
+    await asyncio.sleep(random.uniform(0, interval))
+    while not stop.is_set():
+        path = random.choice(POLL_PATHS)
+        start = time.perf_counter()
+        try:
+            resp = await client.get(base + path)
+            resp.raise_for_status()
+            stats.poll_latencies_ms[path].append((time.perf_counter() - start) * 1000)
+        except Exception:
+            stats.poll_errors += 1
+        await asyncio.sleep(interval)
+
+
+async def sampler(pid: int, stats: Stats, stop: asyncio.Event, interval: float = 1.0):
+    prev = _proc_sample(pid)
+    prev_t = time.monotonic()
+    while not stop.is_set():
+        await asyncio.sleep(interval)
+        cur = _proc_sample(pid)
+        now = time.monotonic()
+        if prev and cur:
+            stats.resource_samples.append({
+                "cpu_pct": round((cur["cpu_s"] - prev["cpu_s"]) / (now - prev_t) * 100, 1),
+                "rss_mb": round(cur["rss_mb"], 1),
+            })
+        prev, prev_t = cur, now
+
+
+async def _start_in_process(tick_seconds: float):
+    import uvicorn
+    import simulation_loop
+    from main import app
+
+    simulation_loop.TICK_SECONDS = tick_seconds
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(
+        app, host="127.0.0.1", port=port, log_level="warning", ws_max_size=2**24,
+    ))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    return f"http://127.0.0.1:{port}", server, task
+
+
+async def run(args) -> dict:
+    _raise_fd_limit(args.clients + args.pollers + 256)
+
+    server = server_task = None
+    if args.url:
+        base = args.url.rstrip("/")
+        pid = args.server_pid
+    else:
+        base, server, server_task = await _start_in_process(args.tick_seconds)
+        pid = os.getpid()
+
+    stats = Stats()
+    stop = asyncio.Event()
+    ws_url = base.replace("http", "ws", 1) + "/ws/live"
+    connect_sem = asyncio.Semaphore(args.connect_concurrency)
+    limits = httpx.Limits(max_connections=args.pollers, max_keepalive_connections=args.pollers)
+
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        tasks = [asyncio.create_task(ws_client(ws_url, stats, stop, connect_sem)) for _ in range(args.clients)]
+        tasks += [asyncio.create_task(poller(base, stats, stop, args.poll_interval, client)) for _ in range(args.pollers)]
+        if pid:
+            tasks.append(asyncio.create_task(sampler(pid, stats, stop)))
+
+        started = time.monotonic()
+        await asyncio.sleep(args.duration)
+        stop.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        elapsed = time.monotonic() - started
+
+    if server:
+        server.should_exit = True
+        await server_task
+
+    lost = max(0, stats.ws_expected - stats.ws_received)
+    cpu = [s["cpu_pct"] for s in stats.resource_samples]
+    rss = [s["rss_mb"] for s in stats.resource_samples]
+    all_polls = [v for vals in stats.poll_latencies_ms.values() for v in vals]
+    return {
+        "config": {
+            "target": base,
+            "in_process": not args.url,
+            "clients": args.clients,
+            "pollers": args.pollers,
+            "poll_interval_s": args.poll_interval,
+            "duration_s": round(elapsed, 1),
+            "tick_seconds": None if args.url else args.tick_seconds,
+        },
+        "websocket": {
+            "connected": stats.ws_connected,
+            "failed": stats.ws_failed,
+            "dropped": stats.ws_dropped,
+            "messages_received": stats.ws_received,
+            "messages_expected": stats.ws_expected,
+            "messages_lost": lost,
+            "loss_ratio": round(lost / stats.ws_expected, 5) if stats.ws_expected else None,
+            "tick_latency_ms": _summarize(stats.latencies_ms),
+        },
+        "rest": {
+            "requests": len(all_polls),
+            "errors": stats.poll_errors,
+            "requests_per_s": round(len(all_polls) / elapsed, 1),
+            "latency_ms": _summarize(all_polls),
+            "by_path": {p: _summarize(v) for p, v in stats.poll_latencies_ms.items()},
+        },
+        "server": {
+            "pid": pid,
+            "cpu_pct": _summarize(cpu),
+            "rss_mb": {"max": max(rss) if rss else None, "last": rss[-1] if rss else None},
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", help="target server (default: start the app in-process)")
+    parser.add_argument("--server-pid", type=int, help="server pid to sample CPU / RSS when using --url")
+    parser.add_argument("--clients", type=int, default=1000, help="WebSocket clients on /ws/live")
+    parser.add_argument("--pollers", type=int, default=20, help="concurrent REST pollers")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="seconds between polls per poller")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to hold load")
+    parser.add_argument("--tick-seconds", type=float, default=1.0, help="simulation tick interval (in-process only)")
+    parser.add_argument("--connect-concurrency", type=int, default=200, help="max WebSocket handshakes in flight")
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
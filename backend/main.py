@@ -5,18 +5,25 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from simulation_loop import state, run_simulation, simulation_tick
-from routes import sensors, risk, alerts, ws, weather
-from config import SCENARIOS
+from simulation_loop import (
+    run_simulation, simulation_tick, start_instances, stop_instances, start_tick_log, stop_tick_log,
+)
+from routes import sensors, risk, alerts, ws, weather, stream, personal, ticklog, scenario, instances
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Warm restart: saved instances come back with their drift + alert state
+    # from the newest checkpoint each
+    await start_instances()
+    start_tick_log()
     # Run one tick immediately so endpoints have data
     await simulation_tick()
     task = asyncio.create_task(run_simulation())
     yield
     task.cancel()
+    await stop_instances()
+    stop_tick_log()
 
 
 app = FastAPI(title="Davis Microclimate Safety Network", lifespan=lifespan)
@@ -26,23 +33,15 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Tick"],
 )
 
-app.include_router(sensors.router)
-app.include_router(risk.router)
-app.include_router(alerts.router)
-app.include_router(ws.router)
+# Per-instance routes: /api/... serves the default instance,
+# /api/instances/{instance_id}/... any named one
+for module in (sensors, risk, alerts, stream, personal, ticklog, scenario):
+    app.include_router(module.router, prefix="/api")
+    app.include_router(module.router, prefix="/api/instances/{instance_id}")
+app.include_router(ws.router, prefix="/ws")
+app.include_router(ws.router, prefix="/ws/instances/{instance_id}")
 app.include_router(weather.router)
-
-
-@app.get("/api/health")
-def health():
-    return {"status": "ok", "scenario": state.scenario, "tick": state.tick_count}
-
-
-@app.post("/api/scenario/{preset}")
-def set_scenario(preset: str):
-    if preset not in SCENARIOS:
-        return {"error": f"Unknown preset. Options: {list(SCENARIOS.keys())}"}
-    state.scenario = preset
-    return {"scenario": preset, "description": SCENARIOS[preset]["description"]}
+app.include_router(instances.router)
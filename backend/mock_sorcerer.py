@@ -1,8 +1,16 @@
-"""Mocked Sorcerer atmospheric context data."""
+"""Mocked Sorcerer atmospheric context data.
 
+The atmosphere is a coarse lattice over the sensor grid rather than one
+city-wide value: each lattice point drifts smoothly toward scenario targets,
+biased by terrain (the south-west is a low-lying fog sink, matching the
+sensor fog gradient). Nodes sample it with cached bilinear weights.
+"""
+
+import math
 import random
 from datetime import datetime, timezone
-from models import SorcererAtmospheric
+from config import FIELD_ROWS, FIELD_COLS
+from models import SorcererAtmospheric, SorcererField
 
 WIND_DIRS = ["N", "NE", "E", "SE", "S", "SW", "W", "NW"]
 
@@ -29,8 +37,184 @@ _PROFILES = {
     },
 }
 
+# Lattice variables, all blended linearly (wind as u/v so direction wraps cleanly)
+FIELD_VARS = (
+    "boundary_layer_height_m", "fog_probability", "inversion_strength",
+    "dew_point_depression_f", "wind_u_mph", "wind_v_mph",
+)
+
+# Per-tick blend toward target (0=jump, 1=frozen) and how strongly terrain
+# vs. noise places a lattice point within the profile range.
+_FIELD_ALPHA = 0.8
+_TERRAIN_SHARE = 0.7
+_WIND_SPREAD_DEG = 30
+
+
+def _compass(u: float, v: float) -> str:
+    """Direction the wind blows FROM, as one of WIND_DIRS."""
+    deg = math.degrees(math.atan2(-u, -v)) % 360
+    return WIND_DIRS[round(deg / 45) % 8]
+
+
+class AtmosphericField:
+    """Coarse lattice of atmospheric values with smooth temporal drift.
+
+    Values are row-major lists (row 0 = south edge, col 0 = west edge).
+    """
+
+    def __init__(self, lat_min: float, lat_max: float, lng_min: float, lng_max: float,
+                 rows: int = FIELD_ROWS, cols: int = FIELD_COLS, rng=None):
+        self._rng = rng or random
+        self.rows, self.cols = rows, cols
+        self.lat_min, self.lat_max = lat_min, lat_max
+        self.lng_min, self.lng_max = lng_min, lng_max
+        self.values: dict[str, list[float]] = {}
+        self.timestamp = datetime.now(timezone.utc)
+        self._prevailing_deg = self._rng.uniform(0, 360)
+        self._scenario = None
+
+        # Stable terrain fog-proneness per lattice point: south-west = 1
+        self._terrain = []
+        for r in range(rows):
+            for c in range(cols):
+                south = 1.0 - r / max(rows - 1, 1)
+                west = 1.0 - c / max(cols - 1, 1)
+                base = 0.6 * south + 0.4 * west + self._rng.uniform(-0.1, 0.1)
+                self._terrain.append(max(0.0, min(1.0, base)))
+
+        # (topology, start, end, [(i00, i01, i10, i11, w00, w01, w10, w11), ...])
+        # for the one node range this field samples. Keyed by the topology
+        # object itself, so it can never match a different grid.
+        self._weights: tuple | None = None
+
+    @classmethod
+    def for_topology(cls, topology, **kwargs) -> "AtmosphericField":
+        lat, lng = topology.lat, topology.lng
+        return cls(min(lat), max(lat), min(lng), max(lng), **kwargs)
+
+    def _targets(self, scenario: str) -> dict[str, list[float]]:
+        p = _PROFILES.get(scenario, _PROFILES["clear_day"])
+        targets = {name: [] for name in FIELD_VARS}
+
+        def place(lo_hi, t):
+            lo, hi = lo_hi
+            return lo + (hi - lo) * t
+
+        for terrain in self._terrain:
+            t = max(0.0, min(1.0, _TERRAIN_SHARE * terrain + (1 - _TERRAIN_SHARE) * self._rng.random()))
+            targets["fog_probability"].append(place(p["fog_prob"], t))
+            targets["inversion_strength"].append(place(p["inversion"], t))
+            # Fog-prone points have a lower mixing layer and near-saturated air
+            targets["boundary_layer_height_m"].append(place(p["blh"], 1 - t))
+            targets["dew_point_depression_f"].append(place(p["dpd"], 1 - t))
+            speed = self._rng.uniform(*p["wind"])
+            heading = math.radians(self._prevailing_deg + self._rng.uniform(-_WIND_SPREAD_DEG, _WIND_SPREAD_DEG))
+            targets["wind_u_mph"].append(speed * math.sin(heading))
+            targets["wind_v_mph"].append(speed * math.cos(heading))
+        return targets
+
+    def step(self, scenario: str = "clear_day"):
+        """Advance one tick: blend every lattice point toward a fresh target."""
+        if scenario != self._scenario:
+            self._prevailing_deg = (self._prevailing_deg + self._rng.uniform(-90, 90)) % 360
+            self._scenario = scenario
+        self._prevailing_deg = (self._prevailing_deg + self._rng.uniform(-3, 3)) % 360
+
+        targets = self._targets(scenario)
+        if not self.values:
+            self.values = targets
+        else:
+            a = _FIELD_ALPHA
+            for name, target in targets.items():
+                self.values[name] = [prev * a + tgt * (1 - a) for prev, tgt in zip(self.values[name], target)]
+        self.timestamp = datetime.now(timezone.utc)
+
+    def _node_weights(self, topology, start: int, end: int) -> list[tuple]:
+        cached = self._weights
+        if cached is not None and cached[0] is topology and cached[1:3] == (start, end):
+            return cached[3]
+
+        lat_span = (self.lat_max - self.lat_min) or 1.0
+        lng_span = (self.lng_max - self.lng_min) or 1.0
+        lat, lng = topology.lat, topology.lng
+        weights = []
+        for i in range(start, end):
+            fr = max(0.0, min(1.0, (lat[i] - self.lat_min) / lat_span)) * (self.rows - 1)
+            fc = max(0.0, min(1.0, (lng[i] - self.lng_min) / lng_span)) * (self.cols - 1)
+            r0, c0 = int(fr), int(fc)
+            r1, c1 = min(r0 + 1, self.rows - 1), min(c0 + 1, self.cols - 1)
+            dr, dc = fr - r0, fc - c0
+            weights.append((
+                r0 * self.cols + c0, r0 * self.cols + c1, r1 * self.cols + c0, r1 * self.cols + c1,
+                (1 - dr) * (1 - dc), (1 - dr) * dc, dr * (1 - dc), dr * dc,
+            ))
+        self._weights = (topology, start, end, weights)
+        return weights
+
+    def sample(self, topology, name: str, start: int = 0, end: int | None = None) -> list[float]:
+        """Bilinear sample of one variable at nodes [start, end) of `topology`."""
+        v = self.values[name]
+        end = topology.n_nodes if end is None else end
+        return [
+            v[a] * wa + v[b] * wb + v[c] * wc + v[d] * wd
+            for a, b, c, d, wa, wb, wc, wd in self._node_weights(topology, start, end)
+        ]
+
+    def fill(self, atmospheric: SorcererAtmospheric):
+        """Set every lattice point to one city-wide value, e.g. when replaying
+        a tick log recorded without the lattice."""
+        speed = atmospheric.wind_speed_mph
+        heading = math.radians(WIND_DIRS.index(atmospheric.wind_direction) * 45)
+        point = {
+            "boundary_layer_height_m": atmospheric.boundary_layer_height_m,
+            "fog_probability": atmospheric.fog_probability,
+            "inversion_strength": atmospheric.inversion_strength,
+            "dew_point_depression_f": atmospheric.dew_point_depression_f,
+            # Direction is where the wind blows FROM (see _compass)
+            "wind_u_mph": -speed * math.sin(heading),
+            "wind_v_mph": -speed * math.cos(heading),
+        }
+        self.values = {name: [point[name]] * (self.rows * self.cols) for name in FIELD_VARS}
+        self.timestamp = atmospheric.timestamp
+
+    def summary(self) -> SorcererAtmospheric:
+        """City-wide mean, for the dashboard panel and snapshot."""
+        n = len(self._terrain)
+        mean = {name: sum(vals) / n for name, vals in self.values.items()}
+        u, v = mean["wind_u_mph"], mean["wind_v_mph"]
+        return SorcererAtmospheric(
+            wind_speed_mph=round(math.hypot(u, v), 1),
+            wind_direction=_compass(u, v),
+            boundary_layer_height_m=round(mean["boundary_layer_height_m"], 0),
+            dew_point_depression_f=round(mean["dew_point_depression_f"], 1),
+            fog_probability=round(mean["fog_probability"], 3),
+            inversion_strength=round(mean["inversion_strength"], 3),
+            timestamp=self.timestamp,
+        )
+
+    def to_model(self, values: dict | None = None) -> SorcererField:
+        """The lattice as served; `values` is an earlier copy of self.values."""
+        values = values or self.values
+        u, v = values["wind_u_mph"], values["wind_v_mph"]
+        return SorcererField(
+            rows=self.rows,
+            cols=self.cols,
+            lat_min=self.lat_min,
+            lat_max=self.lat_max,
+            lng_min=self.lng_min,
+            lng_max=self.lng_max,
+            boundary_layer_height_m=[round(x, 0) for x in values["boundary_layer_height_m"]],
+            fog_probability=[round(x, 3) for x in values["fog_probability"]],
+            inversion_strength=[round(x, 3) for x in values["inversion_strength"]],
+            dew_point_depression_f=[round(x, 1) for x in values["dew_point_depression_f"]],
+            wind_speed_mph=[round(math.hypot(a, b), 1) for a, b in zip(u, v)],
+            wind_direction=[_compass(a, b) for a, b in zip(u, v)],
+            timestamp=self.timestamp,
+        )
+
 
 def generate_atmospheric(scenario: str = "clear_day") -> SorcererAtmospheric:
+    """One-off city-wide draw (no spatial structure or drift)."""
     p = _PROFILES.get(scenario, _PROFILES["clear_day"])
     return SorcererAtmospheric(
         wind_speed_mph=round(random.uniform(*p["wind"]), 1),
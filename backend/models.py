@@ -4,7 +4,7 @@ from __future__ import annotations
 from datetime import datetime
 from enum import Enum
 from typing import Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class RiskLevel(str, Enum):
@@ -51,6 +51,23 @@ class SorcererAtmospheric(BaseModel):
     timestamp: datetime
 
 
+class SorcererField(BaseModel):
+    """Coarse atmospheric lattice; per-variable lists are row-major, row 0 = south."""
+    rows: int
+    cols: int
+    lat_min: float
+    lat_max: float
+    lng_min: float
+    lng_max: float
+    boundary_layer_height_m: list[float]
+    fog_probability: list[float]
+    inversion_strength: list[float]
+    dew_point_depression_f: list[float]
+    wind_speed_mph: list[float]
+    wind_direction: list[str]
+    timestamp: datetime
+
+
 class IntersectionRisk(BaseModel):
     node_id: str
     name: str
@@ -66,9 +83,32 @@ class IntersectionRisk(BaseModel):
     visibility_ft: float
 
 
+class RegionExtent(BaseModel):
+    """Grid rows/cols (inclusive) and lat/lng bounding box of a region."""
+    row_min: int
+    row_max: int
+    col_min: int
+    col_max: int
+    lat_min: float
+    lat_max: float
+    lng_min: float
+    lng_max: float
+
+
+class HazardRegion(BaseModel):
+    """Connected cluster of adjacent intersections past a hazard limit."""
+    id: str
+    hazard: str  # "heat" | "fog"
+    member_count: int
+    peak_value: float  # max heat index °F or min visibility ft
+    peak_int_id: str
+    extent: RegionExtent
+    members: list[str] = []  # int_ids; only listed by /api/regions
+
+
 class Alert(BaseModel):
     id: str
-    node_id: str
+    node_id: str  # int_id, or the region id for region alerts
     node_name: str
     alert_type: AlertType
     severity: AlertSeverity
@@ -76,3 +116,41 @@ class Alert(BaseModel):
     active: bool
     timestamp: datetime
     resolved_at: Optional[datetime] = None
+    region: Optional[HazardRegion] = None
+
+
+class SubscriberProfile(BaseModel):
+    """Personal limits; weights are the 0-100 personalHeat / personalFog scores."""
+    heat_weight: float = Field(default=0, ge=0, le=100)
+    fog_weight: float = Field(default=0, ge=0, le=100)
+    heat_threshold_f: float = 105
+    visibility_threshold_ft: float = 500
+    intersections: list[str] = []  # int_ids to watch; empty = all
+
+
+class Subscriber(SubscriberProfile):
+    id: str
+
+
+class PersonalAlert(BaseModel):
+    id: str
+    subscriber_id: str
+    node_id: str
+    node_name: str
+    hazard: str  # "heat" | "fog"
+    severity: AlertSeverity
+    value: float
+    threshold: float
+    message: str
+    active: bool
+    timestamp: datetime
+
+
+class InstanceConfig(BaseModel):
+    """A named simulation instance: its own grid, scenario, drift and alerts."""
+    id: str = Field(pattern=r"^[a-z0-9][a-z0-9_-]{0,39}$")
+    scenario: str = "clear_day"
+    # Generated rows x cols grid tiled into `districts`; None = the default grid
+    rows: Optional[int] = Field(default=None, ge=1)
+    cols: Optional[int] = Field(default=None, ge=1)
+    districts: list[str] = ["downtown"]
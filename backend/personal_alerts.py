@@ -0,0 +1,192 @@
+"""Server-side personal alerts from a threshold-indexed subscriber registry.
+
+Each subscriber's effective heat / visibility limit is precomputed at
+registration and kept in sorted lists per intersection (plus one shared
+list for subscribers watching everywhere). On a tick, an intersection whose
+value moved from `prev` to `cur` only concerns subscribers whose limit lies
+between the two, so a pair of bisects finds exactly who crossed or cleared —
+no scan over every subscriber.
+"""
+
+import secrets
+import uuid
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from config import PERSONAL_HEAT_SHIFT_F, PERSONAL_FOG_SCALE
+from models import AlertSeverity, PersonalAlert, Subscriber, SubscriberProfile
+
+ALL = "*"  # index key for subscribers with no intersection filter
+
+
+def heat_limit(sub: SubscriberProfile) -> float:
+    """Heat index at or above which this subscriber is alerted."""
+    return sub.heat_threshold_f - sub.heat_weight * PERSONAL_HEAT_SHIFT_F
+
+
+def fog_limit(sub: SubscriberProfile) -> float:
+    """Visibility at or below which this subscriber is alerted."""
+    return sub.visibility_threshold_ft * (1 + sub.fog_weight * PERSONAL_FOG_SCALE)
+
+
+class _ThresholdIndex:
+    """Limits sorted ascending, with subscriber ids in a parallel list."""
+
+    def __init__(self):
+        self.limits: list[float] = []
+        self.ids: list[str] = []
+
+    def add(self, limit: float, sub_id: str):
+        i = bisect_right(self.limits, limit)
+        self.limits.insert(i, limit)
+        self.ids.insert(i, sub_id)
+
+    def remove(self, limit: float, sub_id: str):
+        i = bisect_left(self.limits, limit)
+        while i < len(self.limits) and self.limits[i] == limit:
+            if self.ids[i] == sub_id:
+                del self.limits[i], self.ids[i]
+                return
+            i += 1
+
+    def heat_changes(self, prev: float, cur: float) -> tuple[list[str], list[str]]:
+        """(newly over, newly clear) for alert-when value >= limit."""
+        lo, hi = bisect_right(self.limits, min(prev, cur)), bisect_right(self.limits, max(prev, cur))
+        return (self.ids[lo:hi], []) if cur > prev else ([], self.ids[lo:hi])
+
+    def fog_changes(self, prev: float, cur: float) -> tuple[list[str], list[str]]:
+        """(newly over, newly clear) for alert-when value <= limit."""
+        lo, hi = bisect_left(self.limits, min(prev, cur)), bisect_left(self.limits, max(prev, cur))
+        return (self.ids[lo:hi], []) if cur < prev else ([], self.ids[lo:hi])
+
+
+class SubscriberRegistry:
+    def __init__(self):
+        self.subscribers: dict[str, Subscriber] = {}
+        self.tokens: dict[str, str] = {}  # subscriber id -> secret handed out at registration
+        self.seen: dict[str, int] = {}  # subscriber id -> last tick it had a socket or was read
+        self.active: dict[str, dict[tuple[str, str], PersonalAlert]] = {}
+        self._heat: dict[str, _ThresholdIndex] = {}
+        self._fog: dict[str, _ThresholdIndex] = {}
+        self._last: dict[str, tuple[str, float, float]] = {}  # int_id -> (name, heat_index, vis)
+
+    def _keys(self, sub: Subscriber) -> list[str]:
+        return sub.intersections or [ALL]
+
+    def add(self, profile: SubscriberProfile, tick: int = 0) -> tuple[Subscriber, str, list[PersonalAlert]]:
+        """Register; returns the subscriber, its access token, and any limits
+        already crossed at the last tick."""
+        sub = Subscriber(id=str(uuid.uuid4())[:8], **profile.model_dump())
+        token = secrets.token_urlsafe(16)
+        return sub, token, self.register(sub, token, tick)
+
+    def register(self, sub: Subscriber, token: str, tick: int = 0) -> list[PersonalAlert]:
+        """Index an existing subscriber (e.g. restored from a checkpoint)."""
+        self.subscribers[sub.id] = sub
+        self.tokens[sub.id] = token
+        self.seen[sub.id] = tick
+        self.active[sub.id] = {}
+        for key in self._keys(sub):
+            self._heat.setdefault(key, _ThresholdIndex()).add(heat_limit(sub), sub.id)
+            self._fog.setdefault(key, _ThresholdIndex()).add(fog_limit(sub), sub.id)
+
+        watched = set(sub.intersections)
+        initial = []
+        for int_id, (name, hi, vis) in self._last.items():
+            if watched and int_id not in watched:
+                continue
+            if hi >= heat_limit(sub):
+                initial.append(self._open(sub, int_id, name, "heat", hi))
+            if vis <= fog_limit(sub):
+                initial.append(self._open(sub, int_id, name, "fog", vis))
+        return initial
+
+    def check_token(self, sub_id: str, token: str | None) -> bool:
+        expected = self.tokens.get(sub_id)
+        return expected is not None and token is not None and secrets.compare_digest(expected, token)
+
+    def remove(self, sub_id: str) -> bool:
+        sub = self.subscribers.pop(sub_id, None)
+        if sub is None:
+            return False
+        self.active.pop(sub_id, None)
+        self.tokens.pop(sub_id, None)
+        self.seen.pop(sub_id, None)
+        for key in self._keys(sub):
+            self._heat[key].remove(heat_limit(sub), sub_id)
+            self._fog[key].remove(fog_limit(sub), sub_id)
+        return True
+
+    def touch(self, sub_id: str, tick: int):
+        """Renew a subscriber's lease (it has a socket, or was just read)."""
+        if sub_id in self.subscribers:
+            self.seen[sub_id] = tick
+
+    def expire(self, before_tick: int) -> list[str]:
+        """Drop subscribers not seen since before `before_tick`; returns their ids."""
+        stale = [sub_id for sub_id, tick in list(self.seen.items()) if tick < before_tick]
+        for sub_id in stale:
+            self.remove(sub_id)
+        return stale
+
+    def _open(self, sub: Subscriber, int_id: str, name: str, hazard: str, value: float) -> PersonalAlert:
+        if hazard == "heat":
+            limit = heat_limit(sub)
+            message = f"Personal heat alert: {name} heat index {value:.0f}°F is over your {limit:.0f}°F limit"
+        else:
+            limit = fog_limit(sub)
+            message = f"Personal fog alert: {name} visibility {value:.0f}ft is under your {limit:.0f}ft limit"
+        alert = PersonalAlert(
+            id=str(uuid.uuid4())[:8],
+            subscriber_id=sub.id,
+            node_id=int_id,
+            node_name=name,
+            hazard=hazard,
+            severity=AlertSeverity.ADVISORY,
+            value=value,
+            threshold=round(limit, 1),
+            message=message,
+            active=True,
+            timestamp=datetime.now(timezone.utc),
+        )
+        self.active[sub.id][(int_id, hazard)] = alert
+        return alert
+
+    def _close(self, sub_id: str, int_id: str, hazard: str) -> PersonalAlert | None:
+        alert = self.active[sub_id].pop((int_id, hazard), None)
+        if alert:
+            alert.active = False
+        return alert
+
+    def evaluate(self, intersections: list[dict]) -> dict[str, list[PersonalAlert]]:
+        """Per-tick pass over intersection averages; returns opened/closed
+        alerts grouped by subscriber id."""
+        events: dict[str, list[PersonalAlert]] = {}
+        for ix in intersections:
+            int_id, name = ix["int_id"], ix["name"]
+            hi, vis = ix["heat_index_f"], ix["visibility_ft"]
+            prev = self._last.get(int_id)
+            self._last[int_id] = (name, hi, vis)
+            # First sighting: treat as rising from -inf heat / +inf visibility
+            prev_hi, prev_vis = (prev[1], prev[2]) if prev else (float("-inf"), float("inf"))
+
+            for key in (int_id, ALL):
+                for hazard, index, value, prev_value in (
+                    ("heat", self._heat.get(key), hi, prev_hi),
+                    ("fog", self._fog.get(key), vis, prev_vis),
+                ):
+                    if index is None or value == prev_value:
+                        continue
+                    changes = index.heat_changes if hazard == "heat" else index.fog_changes
+                    opened, closed = changes(prev_value, value)
+                    for sub_id in opened:
+                        events.setdefault(sub_id, []).append(
+                            self._open(self.subscribers[sub_id], int_id, name, hazard, value)
+                        )
+                    for sub_id in closed:
+                        alert = self._close(sub_id, int_id, hazard)
+                        if alert:
+                            events.setdefault(sub_id, []).append(alert)
+        return events
+
+    def get_alerts(self, sub_id: str) -> list[PersonalAlert]:
+        return sorted(self.active.get(sub_id, {}).values(), key=lambda a: a.timestamp, reverse=True)
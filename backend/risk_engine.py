@@ -1,7 +1,9 @@
 """Fusion: sensors + Sorcerer atmospheric prior → risk scores."""
 
 from config import WEIGHT_SENSOR_HEAT, WEIGHT_SENSOR_FOG, WEIGHT_SORCERER_PRIOR
+from mock_sorcerer import AtmosphericField
 from models import SensorReading, SorcererAtmospheric, IntersectionRisk, RiskLevel
+from topology import Topology
 
 
 def _normalize(value: float, low: float, high: float) -> float:
@@ -23,41 +25,46 @@ def compute_risk(
     reading: SensorReading,
     atmospheric: SorcererAtmospheric,
 ) -> IntersectionRisk:
-    factors = []
+    return _fuse(
+        reading,
+        atmospheric.fog_probability,
+        atmospheric.inversion_strength,
+        atmospheric.boundary_layer_height_m,
+    )
+
 
+def fuse_scores(
+    heat_index_f: float,
+    humidity: float,
+    visibility_ft: float,
+    fog_probability: float,
+    inversion_strength: float,
+    boundary_layer_height_m: float,
+) -> tuple[float, float, float]:
+    """Unrounded (heat_risk, fog_risk, combined_risk) for one node."""
     # Heat risk: heat_index 85F=0, 120F=100
-    heat_raw = _normalize(reading.heat_index_f, 85, 120)
-    if heat_raw > 30:
-        factors.append(f"Heat index {reading.heat_index_f:.0f}°F")
+    heat_raw = _normalize(heat_index_f, 85, 120)
 
     # Sorcerer humidity boost for heat
-    if reading.humidity > 60 and heat_raw > 20:
-        boost = (reading.humidity - 60) / 40 * 15
+    if humidity > 60 and heat_raw > 20:
+        boost = (humidity - 60) / 40 * 15
         heat_raw = min(100, heat_raw + boost)
-        factors.append(f"High humidity ({reading.humidity:.0f}%) amplifying heat")
 
     # Fog risk: inverse normalize visibility (2000ft=0, 50ft=100)
-    fog_raw = _normalize(2000 - reading.visibility_ft, 0, 1950)
-    if fog_raw > 30:
-        factors.append(f"Visibility {reading.visibility_ft:.0f}ft")
+    fog_raw = _normalize(2000 - visibility_ft, 0, 1950)
 
     # Sorcerer prior adjustments
     sorcerer_boost = 0.0
-    if atmospheric.fog_probability > 0.5:
-        fog_boost = atmospheric.fog_probability * 30
+    if fog_probability > 0.5:
+        fog_boost = fog_probability * 30
         sorcerer_boost += fog_boost
         fog_raw = min(100, fog_raw + fog_boost * 0.3)
-        factors.append(f"Sorcerer fog probability {atmospheric.fog_probability:.0%}")
 
-    if atmospheric.inversion_strength > 0.5:
-        inv_boost = atmospheric.inversion_strength * 20
-        sorcerer_boost += inv_boost
-        factors.append(f"Temperature inversion (strength {atmospheric.inversion_strength:.2f})")
+    if inversion_strength > 0.5:
+        sorcerer_boost += inversion_strength * 20
 
-    if atmospheric.boundary_layer_height_m < 200:
-        blh_boost = (200 - atmospheric.boundary_layer_height_m) / 200 * 25
-        sorcerer_boost += blh_boost
-        factors.append(f"Low boundary layer ({atmospheric.boundary_layer_height_m:.0f}m)")
+    if boundary_layer_height_m < 200:
+        sorcerer_boost += (200 - boundary_layer_height_m) / 200 * 25
 
     sorcerer_score = min(100, sorcerer_boost)
 
@@ -65,11 +72,44 @@ def compute_risk(
     primary = max(heat_raw, fog_raw)
     secondary = min(heat_raw, fog_raw)
     combined = primary * 0.70 + secondary * 0.15 + sorcerer_score * 0.15
-    combined = min(100, max(0, combined))
+    return heat_raw, fog_raw, min(100, max(0, combined))
 
+
+def _factors(
+    reading: SensorReading,
+    fog_probability: float,
+    inversion_strength: float,
+    boundary_layer_height_m: float,
+) -> list[str]:
+    """Human-readable drivers; thresholds mirror fuse_scores()."""
+    factors = []
+    heat_base = _normalize(reading.heat_index_f, 85, 120)
+    if heat_base > 30:
+        factors.append(f"Heat index {reading.heat_index_f:.0f}°F")
+    if reading.humidity > 60 and heat_base > 20:
+        factors.append(f"High humidity ({reading.humidity:.0f}%) amplifying heat")
+    if _normalize(2000 - reading.visibility_ft, 0, 1950) > 30:
+        factors.append(f"Visibility {reading.visibility_ft:.0f}ft")
+    if fog_probability > 0.5:
+        factors.append(f"Sorcerer fog probability {fog_probability:.0%}")
+    if inversion_strength > 0.5:
+        factors.append(f"Temperature inversion (strength {inversion_strength:.2f})")
+    if boundary_layer_height_m < 200:
+        factors.append(f"Low boundary layer ({boundary_layer_height_m:.0f}m)")
     if not factors:
         factors.append("Conditions normal")
+    return factors
+
 
+def build_risk(
+    reading: SensorReading,
+    scores: tuple[float, float, float],
+    fog_probability: float,
+    inversion_strength: float,
+    boundary_layer_height_m: float,
+) -> IntersectionRisk:
+    """Wrap precomputed fuse_scores() output as an IntersectionRisk."""
+    heat_raw, fog_raw, combined = scores
     return IntersectionRisk(
         node_id=reading.node_id,
         name=reading.name,
@@ -80,14 +120,33 @@ def compute_risk(
         fog_risk=round(fog_raw, 1),
         combined_risk=round(combined, 1),
         risk_level=_classify(combined),
-        contributing_factors=factors,
+        contributing_factors=_factors(reading, fog_probability, inversion_strength, boundary_layer_height_m),
         temp_f=reading.temp_f,
         visibility_ft=reading.visibility_ft,
     )
 
 
+def _fuse(
+    reading: SensorReading,
+    fog_probability: float,
+    inversion_strength: float,
+    boundary_layer_height_m: float,
+) -> IntersectionRisk:
+    scores = fuse_scores(
+        reading.heat_index_f, reading.humidity, reading.visibility_ft,
+        fog_probability, inversion_strength, boundary_layer_height_m,
+    )
+    return build_risk(reading, scores, fog_probability, inversion_strength, boundary_layer_height_m)
+
+
 def compute_all_risks(
     readings: list[SensorReading],
-    atmospheric: SorcererAtmospheric,
+    field: AtmosphericField,
+    topology: Topology,
 ) -> list[IntersectionRisk]:
-    return [compute_risk(r, atmospheric) for r in readings]
+    """Batched fusion: each node gets its own bilinearly-sampled prior from
+    the AtmosphericField; `readings` must be in `topology` node order."""
+    fog = field.sample(topology, "fog_probability")
+    inv = field.sample(topology, "inversion_strength")
+    blh = field.sample(topology, "boundary_layer_height_m")
+    return [_fuse(r, f, i, b) for r, f, i, b in zip(readings, fog, inv, blh)]
@@ -0,0 +1,27 @@
+"""API routers.
+
+Per-instance routers carry no prefix of their own: main.py mounts each one at
+/api (the default instance) and at /api/instances/{instance_id}.
+"""
+
+from fastapi import HTTPException, Response
+from simulation_loop import AppState, DEFAULT_INSTANCE, registry
+
+
+def get_sim(instance_id: str = DEFAULT_INSTANCE) -> AppState:
+    """Resolve the instance from the path (or ?instance_id= on /api routes)."""
+    sim = registry.get(instance_id)
+    if sim is None:
+        raise HTTPException(status_code=404, detail=f"Unknown instance {instance_id}")
+    return sim
+
+
+def tick_response(sim: AppState, view: str) -> Response:
+    """The current tick's cached `view` (see AppState.view) as a JSON response."""
+    if sim.closed:  # removed while the request was parked
+        raise HTTPException(status_code=404, detail=f"Unknown instance {sim.id}")
+    return Response(
+        content=sim.view(view),
+        media_type="application/json",
+        headers={"X-Tick": str(sim.tick_count)},
+    )
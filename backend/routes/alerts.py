@@ -1,16 +1,38 @@
-from fastapi import APIRouter
-from simulation_loop import state
+from typing import Optional
+from fastapi import APIRouter, Depends, Query, Response
+from config import REGION_MIN_CELLS
+from simulation_loop import AppState
+from routes import get_sim, tick_response
 
-router = APIRouter(prefix="/api")
+router = APIRouter()
 
 
 @router.get("/alerts")
-def get_alerts():
-    return [a.model_dump(mode="json") for a in state.alerts]
+async def get_alerts(
+    since_tick: Optional[int] = Query(default=None, ge=0),
+    sim: AppState = Depends(get_sim),
+):
+    await sim.wait_for_tick(since_tick)
+    return tick_response(sim, "alerts")
 
 
 @router.post("/alerts/clear")
-def clear_alerts():
-    state.alert_engine.clear()
-    state.alerts = []
+def clear_alerts(sim: AppState = Depends(get_sim)):
+    with sim.lock:
+        sim.clear_alerts()
+    sim.invalidate()
     return {"cleared": True, "alerts": []}
+
+
+@router.get("/regions")
+def get_regions(
+    response: Response,
+    min_cells: int = Query(default=REGION_MIN_CELLS, ge=1),
+    members: bool = False,
+    sim: AppState = Depends(get_sim),
+):
+    """Connected hazard regions, largest first; `members` lists their int_ids."""
+    with sim.lock:
+        regions = sim.regions.regions(min_cells, members)
+        response.headers["X-Tick"] = str(sim.tick_count)
+    return [r.model_dump(mode="json") for r in regions]
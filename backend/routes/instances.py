@@ -0,0 +1,59 @@
+"""Simulation instance registry: list, create and remove named instances."""
+
+import asyncio
+from fastapi import APIRouter
+from models import InstanceConfig
+from simulation_loop import registry
+
+router = APIRouter(prefix="/api/instances")
+
+
+def _describe(sim) -> dict:
+    return {
+        **sim.config.model_dump(),
+        "scenario": sim.scenario,
+        "tick": sim.tick_count,
+        "nodes": sim.topology.n_nodes,
+    }
+
+
+@router.get("")
+def list_instances():
+    return [_describe(sim) for sim in registry.instances.values()]
+
+
+@router.post("")
+async def create_instance(config: InstanceConfig):
+    try:
+        sim = registry.create(config, register=False)
+    except ValueError as exc:
+        return {"error": str(exc)}
+    # One tick now so the new instance's endpoints have data. It runs before
+    # the scheduler can see the instance, so it never ticks twice at once.
+    try:
+        await sim.tick()
+    except Exception:
+        registry.release(sim.id)
+        raise
+    registry.register(sim)
+    await asyncio.to_thread(registry.save)
+    return _describe(sim)
+
+
+@router.get("/{instance_id}")
+def get_instance(instance_id: str):
+    sim = registry.get(instance_id)
+    if sim is None:
+        return {"error": f"Unknown instance {instance_id}"}
+    return _describe(sim)
+
+
+@router.delete("/{instance_id}")
+async def remove_instance(instance_id: str):
+    try:
+        removed = await registry.remove(instance_id)
+    except ValueError as exc:
+        return {"error": str(exc)}
+    if removed:
+        await asyncio.to_thread(registry.save)
+    return {"removed": removed}
@@ -0,0 +1,47 @@
+"""Personal alert subscriptions (profile weights + custom thresholds).
+
+Registration returns a token; reading or removing a subscription, and
+attaching a WebSocket to it, all require that token.
+"""
+
+from typing import Optional
+from fastapi import APIRouter, Depends
+from models import SubscriberProfile
+from simulation_loop import AppState
+from routes import get_sim
+
+router = APIRouter()
+
+
+@router.post("/subscribers")
+def add_subscriber(profile: SubscriberProfile, sim: AppState = Depends(get_sim)):
+    with sim.lock:
+        sub, token, alerts = sim.subscribers.add(profile, sim.tick_count)
+    return {
+        "subscriber": sub.model_dump(mode="json"),
+        "token": token,
+        "alerts": [a.model_dump(mode="json") for a in alerts],
+    }
+
+
+@router.get("/subscribers/{sub_id}")
+def get_subscriber(sub_id: str, token: Optional[str] = None, sim: AppState = Depends(get_sim)):
+    if not sim.subscribers.check_token(sub_id, token):
+        return {"error": f"Unknown subscriber {sub_id} or bad token"}
+    sim.subscribers.touch(sub_id, sim.tick_count)
+    sub = sim.subscribers.subscribers[sub_id]
+    return {
+        "subscriber": sub.model_dump(mode="json"),
+        "alerts": [a.model_dump(mode="json") for a in sim.subscribers.get_alerts(sub_id)],
+    }
+
+
+@router.delete("/subscribers/{sub_id}")
+def remove_subscriber(sub_id: str, token: Optional[str] = None, sim: AppState = Depends(get_sim)):
+    if not sim.subscribers.check_token(sub_id, token):
+        return {"error": f"Unknown subscriber {sub_id} or bad token"}
+    with sim.lock:
+        removed = sim.subscribers.remove(sub_id)
+    # Its sockets stay connected for the shared snapshot, just without pushes
+    sim.subscriber_ws.pop(sub_id, None)
+    return {"removed": removed}
@@ -1,22 +1,38 @@
-from fastapi import APIRouter, Query
-from simulation_loop import state
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from simulation_loop import AppState
+from routes import get_sim, tick_response
 
-router = APIRouter(prefix="/api")
+router = APIRouter()
+
+# Every snapshot endpoint takes ?since_tick=N: it long-polls until a tick
+# newer than N exists, and reports the tick it served in X-Tick. Bodies are
+# the instance's per-tick cached JSON, so waking N waiters dumps nothing.
 
 
 @router.get("/risk-map")
-def get_risk_map():
-    return [r.model_dump(mode="json") for r in state.risks]
+async def get_risk_map(
+    since_tick: Optional[int] = Query(default=None, ge=0),
+    sim: AppState = Depends(get_sim),
+):
+    await sim.wait_for_tick(since_tick)
+    return tick_response(sim, "risks")
 
 
 @router.get("/top-risk")
-def get_top_risk(limit: int = Query(default=5, ge=1, le=15)):
-    sorted_risks = sorted(state.risks, key=lambda r: r.combined_risk, reverse=True)
-    return [r.model_dump(mode="json") for r in sorted_risks[:limit]]
+async def get_top_risk(
+    limit: int = Query(default=5, ge=1, le=15),
+    since_tick: Optional[int] = Query(default=None, ge=0),
+    sim: AppState = Depends(get_sim),
+):
+    await sim.wait_for_tick(since_tick)
+    return tick_response(sim, f"top-risk:{limit}")
 
 
 @router.get("/sorcerer")
-def get_sorcerer():
-    if state.atmospheric:
-        return state.atmospheric.model_dump(mode="json")
-    return {}
+async def get_sorcerer(
+    since_tick: Optional[int] = Query(default=None, ge=0),
+    sim: AppState = Depends(get_sim),
+):
+    await sim.wait_for_tick(since_tick)
+    return tick_response(sim, "sorcerer")
@@ -0,0 +1,28 @@
+"""Per-instance health and scenario switching."""
+
+from fastapi import APIRouter, Depends
+from config import SCENARIOS
+from simulation_loop import AppState, registry
+from routes import get_sim
+
+router = APIRouter()
+
+
+@router.get("/health")
+def health(sim: AppState = Depends(get_sim)):
+    return {
+        "status": "ok",
+        "instance": sim.id,
+        "scenario": sim.scenario,
+        "tick": sim.tick_count,
+        "instances": len(registry.instances),
+    }
+
+
+@router.post("/scenario/{preset}")
+def set_scenario(preset: str, sim: AppState = Depends(get_sim)):
+    if preset not in SCENARIOS:
+        return {"error": f"Unknown preset. Options: {list(SCENARIOS.keys())}"}
+    sim.scenario = preset
+    sim.invalidate()
+    return {"scenario": preset, "description": SCENARIOS[preset]["description"]}
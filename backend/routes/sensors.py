@@ -1,9 +1,15 @@
-from fastapi import APIRouter
-from simulation_loop import state
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from simulation_loop import AppState
+from routes import get_sim, tick_response
 
-router = APIRouter(prefix="/api")
+router = APIRouter()
 
 
 @router.get("/sensors")
-def get_sensors():
-    return [r.model_dump(mode="json") for r in state.readings]
+async def get_sensors(
+    since_tick: Optional[int] = Query(default=None, ge=0),
+    sim: AppState = Depends(get_sim),
+):
+    await sim.wait_for_tick(since_tick)
+    return tick_response(sim, "sensors")
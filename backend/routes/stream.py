@@ -0,0 +1,33 @@
+"""Server-Sent Events stream of the per-tick snapshot."""
+
+from typing import Optional
+from fastapi import APIRouter, Depends, Header
+from fastapi.responses import StreamingResponse
+from simulation_loop import AppState
+from routes import get_sim
+
+router = APIRouter()
+
+
+@router.get("/stream")
+async def stream(last_event_id: Optional[str] = Header(default=None), sim: AppState = Depends(get_sim)):
+    try:
+        since = int(last_event_id) if last_event_id else None
+    except ValueError:
+        since = None
+
+    async def events():
+        seen = since
+        while not sim.closed:
+            # Reconnects that are already current park until the next tick
+            await sim.wait_for_tick(seen)
+            if sim.closed:
+                break  # instance removed: end the stream
+            seen = sim.tick_count
+            yield sim.sse_frame()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,107 @@
+"""Tick log replay control and streaming export."""
+
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from simulation_loop import AppState
+from routes import get_sim
+from tick_log import COLUMNS, read_ticks
+
+router = APIRouter()
+
+# Rows buffered per CSV chunk, so huge ticks don't become one giant write
+_CSV_CHUNK_ROWS = 5000
+
+
+@router.post("/replay")
+def replay(
+    start_tick: Optional[int] = Query(default=None, ge=0),
+    speed: int = Query(default=1, ge=1, le=100),
+    sim: AppState = Depends(get_sim),
+):
+    with sim.lock:
+        sim.start_replay(start_tick=start_tick, speed=speed)
+    return {"scenario": "replay", "start_tick": start_tick, "speed": speed}
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
+
+
+def _ndjson(records):
+    for rec in records:
+        line = {
+            "tick": rec.tick,
+            "timestamp": _iso(rec.timestamp),
+            "scenario": rec.scenario,
+            "atmospheric": rec.sorcerer().model_dump(mode="json") if rec.atmospheric else None,
+            "node_id": rec.node_ids,
+            **{name: [round(v, 1) for v in rec.columns[name]] for name in COLUMNS},
+            "alert_events": rec.events,
+        }
+        yield (json.dumps(line, separators=(",", ":")) + "\n").encode()
+
+
+def _csv(records):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(["tick", "timestamp", "node_id", *COLUMNS])
+    for rec in records:
+        ts = _iso(rec.timestamp)
+        cols = [rec.columns[name] for name in COLUMNS]
+        for i, nid in enumerate(rec.node_ids):
+            writer.writerow([rec.tick, ts, nid, *(round(c[i], 1) for c in cols)])
+            if (i + 1) % _CSV_CHUNK_ROWS == 0:
+                yield buf.getvalue().encode()
+                buf.seek(0)
+                buf.truncate()
+        yield buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate()
+
+
+def _arrow(records, pa):
+    import pyarrow.ipc
+
+    schema = pa.schema([
+        ("tick", pa.int64()), ("timestamp", pa.timestamp("ms", tz="UTC")), ("node_id", pa.string()),
+        *((name, pa.float32()) for name in COLUMNS),
+    ])
+    sink = io.BytesIO()
+    with pyarrow.ipc.new_stream(sink, schema) as writer:
+        for rec in records:
+            n = len(rec.node_ids)
+            writer.write_batch(pa.record_batch([
+                pa.array([rec.tick] * n, pa.int64()),
+                pa.array([int(rec.timestamp * 1000)] * n, pa.int64()).cast(pa.timestamp("ms", tz="UTC")),
+                pa.array(rec.node_ids, pa.string()),
+                *(pa.array(rec.columns[name], pa.float32()) for name in COLUMNS),
+            ], schema=schema))
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+    yield sink.getvalue()  # end-of-stream marker
+
+
+@router.get("/export")
+def export(
+    start_tick: Optional[int] = Query(default=None, ge=0),
+    end_tick: Optional[int] = Query(default=None, ge=0),
+    format: str = Query(default="ndjson", pattern="^(ndjson|csv|arrow)$"),
+    sim: AppState = Depends(get_sim),
+):
+    """Stream logged ticks in [start_tick, end_tick], one tick per chunk."""
+    records = read_ticks(sim.tick_log_dir, start_tick=start_tick, end_tick=end_tick)
+    if format == "csv":
+        return StreamingResponse(_csv(records), media_type="text/csv")
+    if format == "arrow":
+        try:
+            import pyarrow as pa
+        except ImportError:
+            return {"error": "Arrow export needs pyarrow installed"}
+        return StreamingResponse(_arrow(records, pa), media_type="application/vnd.apache.arrow.stream")
+    return StreamingResponse(_ndjson(records), media_type="application/x-ndjson")
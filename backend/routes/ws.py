@@ -1,22 +1,43 @@
+from typing import Optional
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from simulation_loop import state
-import json
+from simulation_loop import DEFAULT_INSTANCE, registry, personal_alerts_message
 
 router = APIRouter()
 
 
-@router.websocket("/ws/live")
-async def websocket_live(ws: WebSocket):
+@router.websocket("/live")
+async def websocket_live(
+    ws: WebSocket,
+    instance_id: str = DEFAULT_INSTANCE,
+    subscriber: Optional[str] = None,
+    token: Optional[str] = None,
+):
+    sim = registry.get(instance_id)
+    # Personal pushes only for the holder of the registration token
+    if sim is None or (subscriber and not sim.subscribers.check_token(subscriber, token)):
+        await ws.close(code=1008)
+        return
     await ws.accept()
-    state.ws_clients.append(ws)
+    sim.ws_clients.append(ws)
+    if subscriber:
+        sim.subscriber_ws.setdefault(subscriber, set()).add(ws)
+        sim.subscribers.touch(subscriber, sim.tick_count)
     try:
         # Send initial snapshot
-        await ws.send_text(json.dumps(state.snapshot(), default=str))
+        await ws.send_text(sim.payload())
+        if subscriber:
+            await ws.send_text(personal_alerts_message(subscriber, sim.subscribers.get_alerts(subscriber)))
         # Keep connection alive — simulation_loop broadcasts updates
         while True:
             await ws.receive_text()
     except WebSocketDisconnect:
         pass
     finally:
-        if ws in state.ws_clients:
-            state.ws_clients.remove(ws)
+        if ws in sim.ws_clients:
+            sim.ws_clients.remove(ws)
+        if subscriber:
+            sockets = sim.subscriber_ws.get(subscriber)
+            if sockets is not None:
+                sockets.discard(ws)
+                if not sockets:
+                    sim.subscriber_ws.pop(subscriber, None)
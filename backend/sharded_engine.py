@@ -0,0 +1,340 @@
+"""Sharded multi-process simulation for very large grids.
+
+Grid rows are split across worker processes. Each shard owns the drift
+state, risk fusion, intersection averaging and alert debouncing for its
+rows, and writes its slice of every node and intersection column into one
+shared-memory block. The coordinator steps the atmospheric field, sends one
+small tick message per shard, waits for all of them (a barrier, so the
+columns always hold one consistent tick) and merges the alert deltas and
+riskiest intersections they return. Only the intersections it serves (the
+riskiest SHARD_SERVE_INTERSECTIONS plus any under an alert) are turned into
+reading and risk models; everything else stays in the columns.
+
+Randomness comes from one stream per grid row, seeded from (seed, row), so
+results are identical for any shard count.
+
+    python sharded_engine.py --rows 500 --cols 500 --shards 8 --ticks 5
+"""
+
+import argparse
+import heapq
+import multiprocessing as mp
+import os
+import random
+import time
+from array import array
+from datetime import datetime, timezone
+from functools import cached_property
+from multiprocessing.shared_memory import SharedMemory
+
+from alert_engine import AlertEngine, MAX_ALERTS
+from config import SHARD_SERVE_INTERSECTIONS
+from mock_sensors import drift_node, resolve_preset
+from mock_sorcerer import AtmosphericField
+from models import SensorReading, IntersectionRisk
+from risk_engine import fuse_scores, build_risk
+from topology import CORNERS, Topology, default_topology, intersection_id
+
+COLUMNS = (
+    "temp_f", "humidity", "visibility_ft", "heat_index_f",
+    "fog_probability", "inversion_strength", "boundary_layer_height_m",
+    "heat_risk", "fog_risk", "combined_risk",
+)
+_COL = {name: k for k, name in enumerate(COLUMNS)}
+# Per intersection, after the node columns: corner averages rounded as in
+# alert_engine.group_intersections, and the worst corner's combined risk
+INT_COLUMNS = ("temp_f", "heat_index_f", "visibility_ft", "combined_risk")
+_INT_COL = {name: k for k, name in enumerate(INT_COLUMNS)}
+
+
+def _shard_main(conn, shm_name, n_total, start, count, topology, rows, seed, bounds, top_k):
+    """Worker loop: one ("tick", ...) message in, one alert delta and the
+    shard's `top_k` riskiest intersections out.
+
+    Owns nodes [start, start + count) of `topology`, i.e. grid `rows`.
+    """
+    shm = SharedMemory(name=shm_name)
+    cols = shm.buf.cast("d")
+    rngs = [random.Random(f"{seed}:{row}") for row in rows]
+    field = AtmosphericField(*bounds)
+    engine = AlertEngine()
+    node_state: list = [None] * count
+    fog_cache: dict[str, float] = {}
+    last_scenario = None
+    nodes_per_row = topology.cols * CORNERS
+    node_ids = [topology.node_id(start + i) for i in range(count)]
+
+    first_ix = start // CORNERS
+    n_int = count // CORNERS
+    int_ids = [intersection_id(first_ix + j) for j in range(n_int)]
+    int_names = [topology.intersection_name(first_ix + j) for j in range(n_int)]
+    int_base = len(COLUMNS) * n_total
+
+    try:
+        while True:
+            msg = conn.recv()
+            if msg[0] == "stop":
+                break
+            _, scenario, tick, live_weather, lattice, clear_alerts = msg
+            if clear_alerts:
+                engine.clear()
+            if scenario != last_scenario:
+                node_state = [None] * count
+                last_scenario = scenario
+            preset = resolve_preset(scenario, live_weather)
+            field.values = lattice
+            fog = field.sample(topology, "fog_probability", start, start + count)
+            inv = field.sample(topology, "inversion_strength", start, start + count)
+            blh = field.sample(topology, "boundary_layer_height_m", start, start + count)
+
+            out = {name: array("d", bytes(8 * count)) for name in COLUMNS}
+            for i in range(count):
+                temp, humidity, vis, hi = drift_node(
+                    topology, start + i, node_ids[i], scenario, preset, live_weather, node_state[i],
+                    fog_cache, rngs[i // nodes_per_row],
+                )
+                node_state[i] = {"temp": temp, "humidity": humidity, "vis": vis}
+                heat, fog_risk, combined = fuse_scores(hi, humidity, vis, fog[i], inv[i], blh[i])
+                out["temp_f"][i] = temp
+                out["humidity"][i] = humidity
+                out["visibility_ft"][i] = vis
+                out["heat_index_f"][i] = hi
+                out["heat_risk"][i] = heat
+                out["fog_risk"][i] = fog_risk
+                out["combined_risk"][i] = combined
+            out["fog_probability"] = array("d", fog)
+            out["inversion_strength"] = array("d", inv)
+            out["boundary_layer_height_m"] = array("d", blh)
+            for name, values in out.items():
+                offset = _COL[name] * n_total + start
+                cols[offset:offset + count] = values
+
+            # Same intersection averaging as alert_engine.group_intersections
+            groups = []
+            agg = {name: array("d", bytes(8 * n_int)) for name in INT_COLUMNS}
+            temps, his, viss = out["temp_f"], out["heat_index_f"], out["visibility_ft"]
+            combined = out["combined_risk"]
+            for j in range(n_int):
+                a, b = j * CORNERS, (j + 1) * CORNERS
+                group = {
+                    "int_id": int_ids[j],
+                    "index": first_ix + j,
+                    "name": int_names[j],
+                    "temp_f": round(sum(temps[a:b]) / CORNERS, 1),
+                    "heat_index_f": round(sum(his[a:b]) / CORNERS, 1),
+                    "visibility_ft": round(sum(viss[a:b]) / CORNERS, 0),
+                }
+                groups.append(group)
+                agg["temp_f"][j] = group["temp_f"]
+                agg["heat_index_f"][j] = group["heat_index_f"]
+                agg["visibility_ft"][j] = group["visibility_ft"]
+                agg["combined_risk"][j] = max(combined[a:b])
+            for name, values in agg.items():
+                offset = int_base + _INT_COL[name] * (n_total // CORNERS) + first_ix
+                cols[offset:offset + n_int] = values
+
+            before = set(engine.active_alerts)
+            engine.process_intersections(groups, tick)
+            after = set(engine.active_alerts)
+            fired = {key: engine.active_alerts[key] for key in after - before}
+            risk = agg["combined_risk"]
+            top = [first_ix + j for j in heapq.nlargest(top_k, range(n_int), key=risk.__getitem__)]
+            conn.send((fired, list(before - after), top))
+    finally:
+        del cols
+        shm.close()
+
+
+class ShardAlerts(AlertEngine):
+    """Coordinator-side merge of every shard's alerts.
+
+    Shards own debouncing; this only tracks what they fired and resolved.
+    clear() is forwarded to the shards with the next tick.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.clear_requested = False
+
+    def merge(self, fired: dict, resolved: list[str]):
+        now = datetime.now(timezone.utc)
+        for key in resolved:
+            alert = self.active_alerts.pop(key, None)
+            if alert:
+                alert.active = False
+                alert.resolved_at = now
+        for key, alert in fired.items():
+            self.active_alerts[key] = alert
+            self.alert_history.append(alert)
+        if len(self.alert_history) > MAX_ALERTS:
+            self.alert_history = self.alert_history[-MAX_ALERTS:]
+
+    def clear(self):
+        super().clear()
+        self.clear_requested = True
+
+
+class ShardedEngine:
+    def __init__(self, topology: Topology | None = None, shards: int = 0, seed: int = 0,
+                 serve: int = SHARD_SERVE_INTERSECTIONS):
+        topology = topology or default_topology()
+        nodes_per_row = topology.cols * CORNERS
+        n_rows = topology.rows
+        shards = max(1, min(shards or os.cpu_count() or 1, n_rows))
+
+        self.topology = topology
+        self.n = topology.n_nodes
+        self.n_int = topology.n_intersections
+        self.serve = serve
+        self.served: list[int] = []  # intersections with models this tick, in grid order
+        # Built once; intersections() only pairs them with the tick's columns
+        self._int_ids = [intersection_id(k) for k in range(self.n_int)]
+        self._int_names = [topology.intersection_name(k) for k in range(self.n_int)]
+        self.field = AtmosphericField.for_topology(topology, rng=random.Random(f"{seed}:field"))
+        self.alerts = ShardAlerts()
+        self.timestamp = datetime.now(timezone.utc)
+        self._shm = SharedMemory(create=True, size=8 * (self.n * len(COLUMNS) + self.n_int * len(INT_COLUMNS)))
+        self._cols = self._shm.buf.cast("d")
+
+        bounds = (self.field.lat_min, self.field.lat_max, self.field.lng_min, self.field.lng_max,
+                  self.field.rows, self.field.cols)
+        ctx = mp.get_context("spawn")
+        self._conns = []
+        self._procs = []
+        rows_per_shard = -(-n_rows // shards)
+        for first_row in range(0, n_rows, rows_per_shard):
+            rows = list(range(first_row, min(first_row + rows_per_shard, n_rows)))
+            start, end = rows[0] * nodes_per_row, (rows[-1] + 1) * nodes_per_row
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(
+                target=_shard_main,
+                args=(child, self._shm.name, self.n, start, end - start, topology, rows, seed, bounds, serve),
+                daemon=True,
+            )
+            proc.start()
+            child.close()
+            self._conns.append(parent)
+            self._procs.append(proc)
+
+    @cached_property
+    def node_ids(self) -> list[str]:
+        """Every node id in grid order (built on first use, e.g. by the tick log)."""
+        return [self.topology.node_id(i) for i in range(self.n)]
+
+    @property
+    def shard_count(self) -> int:
+        return len(self._procs)
+
+    def tick(self, scenario: str, tick: int, live_weather=None):
+        """Advance every shard one tick. Blocking — run off the event loop."""
+        self.field.step(scenario)
+        msg = ("tick", scenario, tick, live_weather, self.field.values, self.alerts.clear_requested)
+        self.alerts.clear_requested = False
+        for conn in self._conns:
+            conn.send(msg)
+        top = []
+        for conn in self._conns:
+            fired, resolved, shard_top = conn.recv()
+            self.alerts.merge(fired, resolved)
+            top.extend(shard_top)
+        self.timestamp = datetime.now(timezone.utc)
+        self.served = self._pick_served(top)
+
+    def _pick_served(self, top: list[int]) -> list[int]:
+        """The riskiest `serve` intersections plus every one under an alert."""
+        if self.n_int <= self.serve:
+            return list(range(self.n_int))
+        risk = self.int_column("combined_risk")
+        served = set(heapq.nlargest(self.serve, top, key=risk.__getitem__))
+        served.update(int(key.split(":", 1)[0][4:]) - 1 for key in self.alerts.active_alerts)  # "int_NN:type"
+        return sorted(served)
+
+    def column(self, name: str) -> memoryview:
+        """Zero-copy view of one column for the last completed tick."""
+        k = _COL[name]
+        return self._cols[k * self.n:(k + 1) * self.n]
+
+    def int_column(self, name: str) -> memoryview:
+        """Zero-copy view of one per-intersection aggregate column."""
+        base = len(COLUMNS) * self.n + _INT_COL[name] * self.n_int
+        return self._cols[base:base + self.n_int]
+
+    def _served_nodes(self):
+        for k in self.served:
+            yield from range(k * CORNERS, (k + 1) * CORNERS)
+
+    def intersections(self) -> list[dict]:
+        """Every intersection's corner averages, as group_intersections() returns them."""
+        temp, hi, vis = (self.int_column(c) for c in ("temp_f", "heat_index_f", "visibility_ft"))
+        return [
+            {"int_id": int_id, "index": k, "name": name,
+             "temp_f": temp[k], "heat_index_f": hi[k], "visibility_ft": vis[k]}
+            for k, (int_id, name) in enumerate(zip(self._int_ids, self._int_names))
+        ]
+
+    def readings(self) -> list[SensorReading]:
+        """Readings of the served intersections' nodes."""
+        temp, hum, vis, hi = (self.column(c) for c in ("temp_f", "humidity", "visibility_ft", "heat_index_f"))
+        topo = self.topology
+        lat, lng = topo.lat, topo.lng
+        return [
+            SensorReading(
+                node_id=topo.node_id(i), name=topo.node_name(i), lat=lat[i], lng=lng[i],
+                zone=topo.zone_name(i // CORNERS),
+                temp_f=temp[i], humidity=hum[i], visibility_ft=vis[i], heat_index_f=hi[i],
+                timestamp=self.timestamp,
+            )
+            for i in self._served_nodes()
+        ]
+
+    def risks(self, readings: list[SensorReading]) -> list[IntersectionRisk]:
+        """Risks for readings() of the same tick."""
+        heat, fog, combined = (self.column(c) for c in ("heat_risk", "fog_risk", "combined_risk"))
+        fog_p, inv, blh = (self.column(c) for c in ("fog_probability", "inversion_strength", "boundary_layer_height_m"))
+        return [
+            build_risk(r, (heat[i], fog[i], combined[i]), fog_p[i], inv[i], blh[i])
+            for i, r in zip(self._served_nodes(), readings)
+        ]
+
+    def close(self):
+        for conn in self._conns:
+            try:
+                conn.send(("stop",))
+            except (BrokenPipeError, OSError):
+                pass
+        for proc in self._procs:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+        self._cols.release()
+        self._shm.close()
+        self._shm.unlink()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the sharded engine on a synthetic grid")
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--cols", type=int, default=100)
+    parser.add_argument("--shards", type=int, default=0, help="worker processes (default: CPU count)")
+    parser.add_argument("--ticks", type=int, default=5)
+    parser.add_argument("--scenario", default="dense_tule_fog")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    engine = ShardedEngine(Topology.generate(args.rows, args.cols), shards=args.shards)
+    print(f"{engine.n:,} nodes on {engine.shard_count} shards, startup {time.perf_counter() - t0:.2f}s")
+    try:
+        for tick in range(args.ticks):
+            t0 = time.perf_counter()
+            engine.tick(args.scenario, tick)
+            readings = engine.readings()
+            engine.risks(readings)
+            engine.intersections()
+            print(f"tick {tick}: {(time.perf_counter() - t0) * 1000:.0f} ms, "
+                  f"{len(engine.alerts.active_alerts)} active alerts, {len(engine.served)} intersections served")
+    finally:
+        engine.close()
+
+
+if __name__ == "__main__":
+    main()
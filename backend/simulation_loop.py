@@ -1,64 +1,541 @@
-"""Background asyncio task — simulation tick every 3 seconds."""
+"""Simulation instances and the shared scheduler that ticks them every 3 seconds.
+
+Each named instance (an AppState) owns its grid, scenario, sensor drift,
+atmospheric field, alert engine, subscribers and sockets. One scheduler task
+ticks every instance per round: the compute half runs on a shared thread
+pool, then each instance publishes on the event loop.
+"""
 
 import asyncio
+import heapq
 import json
+import logging
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from typing import NamedTuple
 
-from mock_sensors import generate_readings
-from mock_sorcerer import generate_atmospheric
+from mock_sensors import SensorDrift
+from mock_sorcerer import AtmosphericField
 from risk_engine import compute_all_risks
-from alert_engine import AlertEngine
+from alert_engine import AlertEngine, group_intersections
+from hazard_regions import HazardRegions
+from personal_alerts import SubscriberRegistry
+from config import (
+    SCENARIOS, CHECKPOINT_DIR, CHECKPOINT_EVERY_TICKS, MAX_INSTANCE_NODES, SIM_SHARDS, SIM_WORKERS,
+    SUBSCRIBER_IDLE_TICKS,
+    TICK_LOG_DIR, TICK_LOG_ENABLED,
+)
+from models import InstanceConfig
+from tick_log import TickLogWriter, TickReplayer
+from topology import CORNERS, Topology, default_topology, generated
+import checkpoint
+import tick_log
 import weather_api
 
+logger = logging.getLogger(__name__)
+
+TICK_SECONDS = 3
+_EXPIRE_EVERY_TICKS = 10  # idle-subscriber sweep interval
+DEFAULT_INSTANCE = "default"
+_REGISTRY_FILE = "instances.json"
+
+executor = ThreadPoolExecutor(max_workers=SIM_WORKERS, thread_name_prefix="sim")
+_tick_log: TickLogWriter | None = None  # one writer thread for every instance
+
+
+def instance_topology(config: InstanceConfig) -> Topology:
+    """Shared topology for an instance config; equal grids share one table."""
+    if config.rows is None and config.cols is None:
+        return default_topology()
+    if config.rows is None or config.cols is None:
+        raise ValueError("Set both rows and cols to generate a grid")
+    return generated(config.rows, config.cols, tuple(config.districts))
+
+
+def _dumps(obj) -> bytes:
+    return json.dumps(obj, default=str).encode()
+
+
+def _instance_dir(base: str, instance_id: str) -> str:
+    # The default instance keeps the top-level directory so existing
+    # checkpoints and tick logs stay where they were.
+    return base if instance_id == DEFAULT_INSTANCE else os.path.join(base, "instances", instance_id)
+
+
+class TickResult(NamedTuple):
+    """One computed tick, built off the loop and published in finish_tick."""
+    before: dict  # alerts active before the tick
+    personal: dict  # personal alert events by subscriber id
+    readings: list
+    risks: list
+    atmospheric: object
+    field_values: dict  # copy of the lattice the risks were computed from
+    alerts: list
+    time: datetime
+
 
 class AppState:
-    def __init__(self):
-        self.scenario: str = "clear_day"
+    def __init__(self, config: InstanceConfig | None = None):
+        config = config or InstanceConfig(id=DEFAULT_INSTANCE)
+        self.id = config.id
+        self.config = config
+        self.topology = instance_topology(config)
+        self.scenario: str = config.scenario
         self.readings = []
         self.atmospheric = None
+        self.drift = SensorDrift(self.topology)
+        self.field = AtmosphericField.for_topology(self.topology)
         self.risks = []
         self.alerts = []
+        self.field_values: dict = {}  # the published tick's lattice (self.field runs ahead)
         self.alert_engine = AlertEngine()
+        self.regions = HazardRegions(self.topology)
+        self.engine = None  # ShardedEngine when sharded
+        self.replay = None  # TickReplayer while scenario == "replay"
         self.ws_clients: list = []
+        self.subscribers = SubscriberRegistry()
+        self.subscriber_ws: dict[str, set] = {}  # subscriber id -> open sockets
+        # readings, risks, atmospheric, field_values, alerts, tick_time and
+        # tick_count are the published tick: compute_tick never writes them,
+        # finish_tick swaps them all at once on the loop
         self.tick_count: int = 0
+        self.tick_time: datetime | None = None  # when the current tick's data was computed
+        self.closed = False  # removed from the registry; late ticks are dropped
+        self.checkpoint_dir = _instance_dir(CHECKPOINT_DIR, self.id)
+        self.tick_log_dir = _instance_dir(TICK_LOG_DIR, self.id)
+        # Held by the compute half of a tick and by sync routes that mutate
+        # engine state (those run on FastAPI's thread pool, not the loop)
+        self.lock = threading.Lock()
+        self._checkpoint_task = None
+        # Replaced every tick; long-poll and SSE waiters park on it (no timers)
+        self._tick_event = asyncio.Event()
+        self._views: tuple | None = None  # (tick, {view key: JSON bytes})
+        self._payload: tuple | None = None  # (snapshot bytes, text, SSE frame bytes)
 
-    def snapshot(self) -> dict:
-        return {
-            "scenario": self.scenario,
-            "tick": self.tick_count,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "sensors": [r.model_dump(mode="json") for r in self.readings],
-            "atmospheric": self.atmospheric.model_dump(mode="json") if self.atmospheric else None,
-            "risks": [r.model_dump(mode="json") for r in self.risks],
-            "alerts": [a.model_dump(mode="json") for a in self.alerts],
-        }
+    # --- per-tick serialization ---
+    # Every view is dumped at most once per tick and shared as bytes by the
+    # WebSocket broadcast, SSE frames and every long-poll waiter.
 
+    def view(self, key: str) -> bytes:
+        """JSON bytes of one view of the current tick: "sensors", "risks",
+        "alerts", "atmospheric", "sorcerer", "top-risk:<n>" or "snapshot"."""
+        cache = self._views
+        if cache is None or cache[0] != self.tick_count:
+            cache = self._views = (self.tick_count, {})
+        data = cache[1].get(key)
+        if data is None:
+            data = cache[1][key] = self._build_view(key)
+        return data
 
-state = AppState()
+    def _build_view(self, key: str) -> bytes:
+        if key == "snapshot":
+            timestamp = (self.tick_time or datetime.now(timezone.utc)).isoformat()
+            return (
+                b'{"instance": %s, "scenario": %s, "tick": %d, "timestamp": %s, '
+                b'"sensors": %s, "atmospheric": %s, "risks": %s, "alerts": %s}' % (
+                    _dumps(self.id), _dumps(self.scenario), self.tick_count, _dumps(timestamp),
+                    self.view("sensors"), self.view("atmospheric"), self.view("risks"), self.view("alerts"),
+                )
+            )
+        if key == "sensors":
+            return _dumps([r.model_dump(mode="json") for r in self.readings])
+        if key == "risks":
+            return _dumps([r.model_dump(mode="json") for r in self.risks])
+        if key == "alerts":
+            return _dumps([a.model_dump(mode="json") for a in self.alerts])
+        if key == "atmospheric":
+            return _dumps(self.atmospheric.model_dump(mode="json") if self.atmospheric else None)
+        if key == "sorcerer":
+            if not self.atmospheric:
+                return b"{}"
+            # City-wide summary keys stay top-level; the lattice itself under "field"
+            return _dumps({
+                **self.atmospheric.model_dump(mode="json"),
+                "field": self.field.to_model(self.field_values).model_dump(mode="json"),
+            })
+        if key.startswith("top-risk:"):
+            top = heapq.nlargest(int(key[len("top-risk:"):]), self.risks, key=lambda r: r.combined_risk)
+            return _dumps([r.model_dump(mode="json") for r in top])
+        raise KeyError(key)
 
+    def payload(self) -> str:
+        """Snapshot JSON, serialized once per tick and shared by every client."""
+        return self._text()[1]
 
-async def simulation_tick():
-    live_weather = weather_api.get_current() if state.scenario == "live" else None
-    state.readings = generate_readings(state.scenario, live_weather=live_weather)
-    state.atmospheric = generate_atmospheric(state.scenario)
-    state.risks = compute_all_risks(state.readings, state.atmospheric)
-    state.alerts = state.alert_engine.process(state.readings, tick=state.tick_count)
-    state.tick_count += 1
-
-    # Broadcast to WebSocket clients
-    if state.ws_clients:
-        data = json.dumps(state.snapshot(), default=str)
-        disconnected = []
-        for ws in state.ws_clients:
+    def sse_frame(self) -> bytes:
+        return self._text()[2]
+
+    def _text(self) -> tuple:
+        body = self.view("snapshot")
+        if self._payload is None or self._payload[0] is not body:
+            frame = b"id: %d\nevent: tick\ndata: %s\n\n" % (self.tick_count, body)
+            self._payload = (body, body.decode(), frame)
+        return self._payload
+
+    def invalidate(self):
+        """Drop the cached views after an out-of-tick state change."""
+        self._views = None
+
+    def publish_tick(self):
+        """Wake every parked waiter by swapping in a fresh event."""
+        event, self._tick_event = self._tick_event, asyncio.Event()
+        event.set()
+
+    async def wait_for_tick(self, since_tick: int | None):
+        """Return once a tick newer than `since_tick` exists.
+
+        A `since_tick` ahead of ours (e.g. the server restarted) returns
+        immediately so the client resyncs instead of hanging. So does a
+        removed instance; callers check `closed`.
+        """
+        while since_tick is not None and since_tick == self.tick_count and not self.closed:
+            await self._tick_event.wait()
+
+    # --- checkpoints ---
+
+    def restore(self) -> bool:
+        """Warm restart from this instance's newest checkpoint (single-process
+        only; shards rebuild their own state). Blocking."""
+        restored = not self.engine and checkpoint.restore(self, self.checkpoint_dir)
+        # Carry tick numbers on past the log (a cold start, or ticks logged
+        # after the last checkpoint) so segments keep sorting in tick order
+        last = tick_log.last_tick(self.tick_log_dir)
+        if last is not None and last > self.tick_count:
+            self.tick_count = last
+        return restored
+
+    def _maybe_checkpoint(self):
+        """Capture state on the loop; encode + write on a worker thread."""
+        if self.engine or self.tick_count % CHECKPOINT_EVERY_TICKS:
+            return
+        if self._checkpoint_task and not self._checkpoint_task.done():
+            return  # previous write still in flight — skip rather than queue up
+        snap = checkpoint.capture(self)
+        self._checkpoint_task = asyncio.create_task(asyncio.to_thread(checkpoint.write, snap, self.checkpoint_dir))
+
+    async def save_checkpoint(self):
+        """Final checkpoint on shutdown, after any in-flight periodic write."""
+        if self.engine:
+            return  # drift state lives in the shard processes
+        if self._checkpoint_task:
+            await self._checkpoint_task
+        await asyncio.to_thread(checkpoint.write, checkpoint.capture(self), self.checkpoint_dir)
+
+    # --- engines ---
+
+    def start_sharded_engine(self, shards: int) -> bool:
+        """Hand this instance's tick to worker processes."""
+        if not shards:
+            return False
+        from sharded_engine import ShardedEngine
+        self.engine = ShardedEngine(self.topology, shards=shards)
+        self.field = self.engine.field
+        self.alert_engine = self.engine.alerts
+        return True
+
+    def start_replay(self, start_tick: int | None = None, speed: int = 1):
+        """Switch to replaying the tick log; alerts restart from the replayed data."""
+        self.replay = TickReplayer(self.topology, self.tick_log_dir, start_tick=start_tick, speed=speed)
+        self.scenario = "replay"
+        self.clear_alerts()
+
+    def clear_alerts(self):
+        self.alert_engine.clear()
+        self.regions.clear()
+        self.alerts = []
+
+    def active_alerts(self) -> dict:
+        """Intersection and region alerts currently firing, by key."""
+        return {**self.alert_engine.active_alerts,
+                **{f"{rid}:region": a for rid, a in self.regions.active_alerts.items()}}
+
+    async def shutdown(self, save: bool = True):
+        """Stop publishing ticks and settle this instance's checkpoint writes."""
+        self.closed = True
+        self.publish_tick()  # parked long-polls and SSE streams see `closed` and leave
+        if save:
+            await self.save_checkpoint()
+        elif self._checkpoint_task:
+            await self._checkpoint_task
+        if self.engine:
+            self.engine.close()
+            self.engine = None
+        for ws in list(self.ws_clients):
             try:
-                await ws.send_text(data)
+                await ws.close()
             except Exception:
-                disconnected.append(ws)
-        for ws in disconnected:
-            state.ws_clients.remove(ws)
+                pass
+
+    # --- tick ---
+
+    def _replay_tick(self) -> tuple:
+        if self.replay is None:
+            self.start_replay()
+        intersections, readings, rec = [], None, None
+        for clock, rec in self.replay.advance():
+            readings = self.replay.readings(rec)
+            intersections = group_intersections(readings, self.topology)
+            self.alert_engine.process_intersections(intersections, tick=clock)
+        if rec is None:
+            return intersections, self.readings, self.risks, self.atmospheric
+        atmospheric = self.atmospheric
+        if rec.atmospheric is not None:
+            atmospheric = rec.sorcerer()
+            if rec.field and rec.field[:2] == (self.field.rows, self.field.cols):
+                # The recorded lattice, so risks match the live ones
+                self.field.values = dict(rec.field[2])
+            else:
+                self.field.fill(atmospheric)  # v1 log: city-wide values only
+        risks = compute_all_risks(readings, self.field, self.topology) if self.field.values else []
+        return intersections, readings, risks, atmospheric
+
+    def compute_tick(self, live_weather=None) -> TickResult:
+        """Advance the simulation state. Blocking — runs on the shared executor.
+
+        The published tick is left alone; finish_tick swaps in the result.
+        """
+        with self.lock:
+            scenario = self.scenario
+            if self.replay is not None and scenario != "replay":
+                # Leaving replay: debounce state refers to the replay clock
+                self.replay = None
+                self.clear_alerts()
+            before = self.active_alerts()
+            if self.tick_count % _EXPIRE_EVERY_TICKS == 0:
+                self.subscribers.expire(self.tick_count - SUBSCRIBER_IDLE_TICKS)
+
+            if scenario == "replay":
+                intersections, readings, risks, atmospheric = self._replay_tick()
+            elif self.engine:
+                self.engine.tick(scenario, self.tick_count, live_weather)
+                readings = self.engine.readings()
+                risks = self.engine.risks(readings)
+                atmospheric = self.field.summary()
+                intersections = self.engine.intersections()
+            else:
+                readings = self.drift.generate(scenario, live_weather=live_weather)
+                self.field.step(scenario)
+                atmospheric = self.field.summary()
+                risks = compute_all_risks(readings, self.field, self.topology)
+                intersections = group_intersections(readings, self.topology)
+                self.alert_engine.process_intersections(intersections, tick=self.tick_count)
+            # Region alerts stand in for the intersection alerts they cover
+            self.regions.update(intersections, tick=self.replay.clock if self.replay else self.tick_count)
+            return TickResult(
+                before=before,
+                personal=self.subscribers.evaluate(intersections),
+                readings=readings,
+                risks=risks,
+                atmospheric=atmospheric,
+                # step() replaces each variable's list, so a shallow copy is a snapshot
+                field_values=dict(self.field.values),
+                alerts=self.regions.filter_alerts(self.alert_engine.get_alerts()),
+                time=datetime.now(timezone.utc),
+            )
+
+    def apply_tick(self, result: TickResult):
+        """Publish a computed tick's data and number in one step (no awaits)."""
+        self.readings, self.risks = result.readings, result.risks
+        self.atmospheric, self.field_values = result.atmospheric, result.field_values
+        self.alerts, self.tick_time = result.alerts, result.time
+        self.tick_count += 1
+
+    def _log_tick(self, before: dict):
+        if _tick_log is None or self.scenario == "replay" or not self.readings:
+            return
+        events = tick_log.alert_events(before, self.active_alerts())
+        _tick_log.append(tick_log.capture(self, events), self.tick_log_dir)
+
+    async def finish_tick(self, result: TickResult):
+        """Publish a computed tick. Runs on the event loop."""
+        if self.closed:
+            return
+        self.apply_tick(result)
+        self._maybe_checkpoint()
+        self._log_tick(result.before)
+        self.publish_tick()
+        for sub_id in self.subscriber_ws:  # connected subscribers keep their lease
+            self.subscribers.touch(sub_id, self.tick_count)
+
+        # Broadcast to WebSocket clients
+        if self.ws_clients:
+            data = self.payload()
+            disconnected = []
+            for ws in self.ws_clients:
+                try:
+                    await ws.send_text(data)
+                except Exception:
+                    disconnected.append(ws)
+            for ws in disconnected:
+                self.ws_clients.remove(ws)
+
+        # Personal alerts go only to the sockets of subscribers whose limit was crossed
+        for sub_id, alerts in result.personal.items():
+            sockets = self.subscriber_ws.get(sub_id)
+            for ws in list(sockets or ()):
+                try:
+                    await ws.send_text(personal_alerts_message(sub_id, alerts))
+                except Exception:
+                    sockets.discard(ws)
+            if sockets is not None and not sockets:
+                self.subscriber_ws.pop(sub_id, None)
+
+    async def tick(self, live_weather=None):
+        """Run one tick of just this instance (e.g. right after creating it)."""
+        loop = asyncio.get_running_loop()
+        await self.finish_tick(await loop.run_in_executor(executor, self.compute_tick, live_weather))
+
+
+def _delete_files(sim: AppState):
+    """Delete a removed instance's checkpoints and tick log. Blocking."""
+    shutil.rmtree(sim.checkpoint_dir, True)
+    if _tick_log is not None:
+        _tick_log.remove_directory(sim.tick_log_dir)  # after its queued appends
+    else:
+        shutil.rmtree(sim.tick_log_dir, True)
+
+
+class SimulationRegistry:
+    """Named simulation instances. The default instance always exists; the
+    others' configs are saved next to the checkpoints so they survive restarts."""
+
+    def __init__(self):
+        self.instances: dict[str, AppState] = {}
+        self._reserved: set[str] = set()  # built with register=False, not yet added
+
+    def get(self, instance_id: str) -> AppState | None:
+        return self.instances.get(instance_id)
+
+    def create(self, config: InstanceConfig, register: bool = True) -> AppState:
+        """Build an instance. With register=False its id is only reserved:
+        routes and the scheduler can't see it until register(sim)."""
+        if config.id in self.instances or config.id in self._reserved:
+            raise ValueError(f"Instance {config.id} already exists")
+        if config.scenario not in SCENARIOS:
+            raise ValueError(f"Unknown preset. Options: {list(SCENARIOS.keys())}")
+        if config.rows and config.cols and config.rows * config.cols * CORNERS > MAX_INSTANCE_NODES:
+            raise ValueError(f"Instance grids are limited to {MAX_INSTANCE_NODES:,} nodes "
+                             f"({MAX_INSTANCE_NODES // CORNERS:,} intersections)")
+        sim = AppState(config)
+        if register:
+            self.instances[config.id] = sim
+        else:
+            self._reserved.add(config.id)
+        return sim
+
+    def register(self, sim: AppState):
+        self._reserved.discard(sim.id)
+        self.instances[sim.id] = sim
+
+    def release(self, instance_id: str):
+        """Give up a reserved id that was never registered."""
+        self._reserved.discard(instance_id)
+
+    async def remove(self, instance_id: str) -> bool:
+        if instance_id == DEFAULT_INSTANCE:
+            raise ValueError("The default instance cannot be removed")
+        sim = self.instances.pop(instance_id, None)
+        if sim is None:
+            return False
+        # No more ticks are published (so nothing new is logged) and any
+        # in-flight checkpoint write has landed before the files go
+        await sim.shutdown(save=False)
+        # A later instance with the same id starts fresh rather than warm
+        await asyncio.to_thread(_delete_files, sim)
+        return True
+
+    def save(self):
+        """Persist non-default instance configs. Blocking — run off the loop."""
+        configs = [s.config.model_dump() for s in self.instances.values() if s.id != DEFAULT_INSTANCE]
+        try:
+            os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+            path = os.path.join(CHECKPOINT_DIR, _REGISTRY_FILE)
+            with open(path + ".tmp", "w") as f:
+                json.dump(configs, f)
+            os.replace(path + ".tmp", path)
+        except OSError as exc:
+            logger.warning("Saving instance registry failed: %s", exc)
+
+    def load(self):
+        try:
+            with open(os.path.join(CHECKPOINT_DIR, _REGISTRY_FILE)) as f:
+                configs = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as exc:
+            logger.warning("Skipping bad instance registry: %s", exc)
+            return
+        for raw in configs:
+            try:
+                self.create(InstanceConfig.model_validate(raw))
+            except ValueError as exc:
+                logger.warning("Skipping saved instance %s: %s", raw, exc)
+
+
+registry = SimulationRegistry()
+state = registry.create(InstanceConfig(id=DEFAULT_INSTANCE))
+
+
+async def start_instances():
+    """Re-create saved instances and warm-restart each from its checkpoint."""
+    await asyncio.to_thread(registry.load)
+    state.start_sharded_engine(SIM_SHARDS)
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(*(loop.run_in_executor(executor, sim.restore) for sim in registry.instances.values()))
+
+
+async def stop_instances():
+    await asyncio.gather(*(sim.shutdown() for sim in registry.instances.values()))
+
+
+def start_tick_log():
+    global _tick_log
+    if TICK_LOG_ENABLED:
+        _tick_log = TickLogWriter()
+        _tick_log.start()
+
+
+def stop_tick_log():
+    global _tick_log
+    if _tick_log:
+        _tick_log.close()
+        _tick_log = None
+
+
+def personal_alerts_message(sub_id: str, alerts: list) -> str:
+    return json.dumps({
+        "type": "personal_alerts",
+        "subscriber_id": sub_id,
+        "alerts": [a.model_dump(mode="json") for a in alerts],
+    })
+
+
+async def simulation_tick():
+    """One scheduler round: every instance computes on the shared executor,
+    then all of them publish concurrently."""
+    instances = list(registry.instances.values())
+    loop = asyncio.get_running_loop()
+    live_weather = None
+    if any(sim.scenario == "live" for sim in instances):
+        live_weather = await loop.run_in_executor(executor, weather_api.get_current)
+
+    results = await asyncio.gather(
+        *(loop.run_in_executor(executor, sim.compute_tick, live_weather) for sim in instances),
+        return_exceptions=True,
+    )
+    finished = []
+    for sim, result in zip(instances, results):
+        if isinstance(result, BaseException):
+            logger.error("Tick failed for instance %s", sim.id, exc_info=result)
+        else:
+            finished.append(sim.finish_tick(result))
+    await asyncio.gather(*finished)
 
 
 async def run_simulation():
     while True:
         await simulation_tick()
-        await asyncio.sleep(3)
+        await asyncio.sleep(TICK_SECONDS)
@@ -0,0 +1,12 @@
+"""Run the backend modules from a scratch checkpoint / tick-log directory."""
+
+import os
+import sys
+import tempfile
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+_scratch = tempfile.mkdtemp(prefix="climatestack-tests-")
+os.environ.setdefault("CHECKPOINT_DIR", os.path.join(_scratch, "checkpoints"))
+os.environ.setdefault("TICK_LOG_DIR", os.path.join(_scratch, "ticklog"))
@@ -0,0 +1,91 @@
+import os
+
+import checkpoint
+from models import InstanceConfig, SubscriberProfile
+from simulation_loop import AppState
+
+
+def _run(state, ticks):
+    for _ in range(ticks):
+        state.apply_tick(state.compute_tick())
+
+
+def _heat_state(instance_id="ck"):
+    state = AppState(InstanceConfig(id=instance_id, scenario="heat_wave"))
+    _run(state, 4)
+    return state
+
+
+def test_round_trip_restores_drift_alerts_and_subscribers(tmp_path):
+    state = _heat_state()
+    sub, token, _ = state.subscribers.add(SubscriberProfile(heat_weight=100))
+    _run(state, 1)
+    assert state.alert_engine.active_alerts and state.subscribers.active[sub.id]
+    checkpoint.write(checkpoint.capture(state), str(tmp_path))
+
+    restored = AppState(InstanceConfig(id="ck"))
+    assert checkpoint.restore(restored, str(tmp_path))
+
+    assert restored.tick_count == state.tick_count
+    assert restored.scenario == "heat_wave"
+    assert restored.drift.node_state == state.drift.node_state
+    assert restored.drift.fog_weights == state.drift.fog_weights
+    assert restored.field.values == state.field.values
+    assert set(restored.alert_engine.active_alerts) == set(state.alert_engine.active_alerts)
+    # Active alerts stay the same objects as their history entries
+    history = {id(a) for a in restored.alert_engine.alert_history}
+    assert all(id(a) in history for a in restored.alert_engine.active_alerts.values())
+
+    assert restored.subscribers.check_token(sub.id, token)
+    assert set(restored.subscribers.active[sub.id]) == set(state.subscribers.active[sub.id])
+
+
+def test_corrupt_newest_checkpoint_falls_back_to_older(tmp_path):
+    state = _heat_state()
+    checkpoint.write(checkpoint.capture(state), str(tmp_path))
+    older = state.tick_count
+    _run(state, 2)
+    checkpoint.write(checkpoint.capture(state), str(tmp_path))
+
+    newest = os.path.join(tmp_path, f"tick_{state.tick_count:010d}.ckpt")
+    with open(newest, "r+b") as f:
+        f.seek(-1, os.SEEK_END)
+        last = f.read(1)
+        f.seek(-1, os.SEEK_END)
+        f.write(bytes([last[0] ^ 0xFF]))
+
+    assert checkpoint.load_latest(str(tmp_path))["tick"] == older
+
+
+def test_truncated_checkpoint_is_skipped(tmp_path):
+    state = _heat_state()
+    checkpoint.write(checkpoint.capture(state), str(tmp_path))
+    (path,) = tmp_path.iterdir()
+    path.write_bytes(path.read_bytes()[:10])
+
+    assert checkpoint.load_latest(str(tmp_path)) is None
+    assert not checkpoint.restore(AppState(InstanceConfig(id="ck")), str(tmp_path))
+
+
+def test_round_trip_keeps_regions_and_region_alerts(tmp_path):
+    state = _heat_state()
+    _run(state, 4)
+    assert state.regions.active_alerts
+    checkpoint.write(checkpoint.capture(state), str(tmp_path))
+
+    restored = AppState(InstanceConfig(id="ck"))
+    assert checkpoint.restore(restored, str(tmp_path))
+
+    assert restored.regions.regions(members=True) == state.regions.regions(members=True)
+    assert {rid: a.id for rid, a in restored.regions.active_alerts.items()} == \
+        {rid: a.id for rid, a in state.regions.active_alerts.items()}
+    # Members stay covered by their region alert; no duplicate intersection alerts
+    intersection_alerts = restored.alert_engine.get_alerts()
+    assert restored.regions.filter_alerts(intersection_alerts) == \
+        state.regions.filter_alerts(state.alert_engine.get_alerts())
+
+    # The next tick refreshes the same region alerts instead of raising new ones
+    _run(state, 1)
+    _run(restored, 1)
+    assert {rid: a.id for rid, a in restored.regions.active_alerts.items()} == \
+        {rid: a.id for rid, a in state.regions.active_alerts.items()}
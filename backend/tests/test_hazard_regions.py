@@ -0,0 +1,127 @@
+import random
+
+from alert_engine import SUSTAIN_TICKS
+from config import REGION_HEAT_F
+from hazard_regions import HazardRegions, _RegionSet
+from topology import Topology, intersection_id
+
+
+def _components(active, rows, cols):
+    """4-connected components of the active cells, by flood fill."""
+    seen, comps = set(), set()
+    for k in range(rows * cols):
+        if active[k] and k not in seen:
+            comp, stack = {k}, [k]
+            seen.add(k)
+            while stack:
+                x = stack.pop()
+                r, c = divmod(x, cols)
+                for nb, ok in ((x - cols, r > 0), (x + cols, r < rows - 1),
+                               (x - 1, c > 0), (x + 1, c < cols - 1)):
+                    if ok and active[nb] and nb not in seen:
+                        seen.add(nb)
+                        comp.add(nb)
+                        stack.append(nb)
+            comps.add(frozenset(comp))
+    return comps
+
+
+def _regions(rs):
+    return {frozenset(m) for m in rs.members.values()}
+
+
+def test_union_find_matches_flood_fill():
+    rng = random.Random(1)
+    for rows, cols in ((12, 15), (1, 20), (20, 1), (7, 7)):
+        rs = _RegionSet("fog", Topology.generate(rows, cols))
+        on = [False] * (rows * cols)
+        for tick in range(300):
+            p = rng.choice((0.3, 0.5, 0.7, 0.9))
+            added, cleared = [], []
+            for k in rng.sample(range(rows * cols), max(1, rows * cols // 8)):
+                want = rng.random() < p
+                if want != on[k]:
+                    (added if want else cleared).append(k)
+                    on[k] = want
+            rs.apply(added, cleared, [], tick)
+
+            assert _regions(rs) == _components(on, rows, cols), (rows, cols, tick)
+            for root, cells in rs.members.items():
+                assert all(rs.find(k) == root for k in cells)
+            assert len(set(rs.region_id.values())) == len(rs.region_id)
+
+
+def test_compaction_keeps_every_region():
+    rng = random.Random(7)
+    for seed in range(300):
+        rng.seed(seed)
+        rows, cols = rng.randint(2, 5), rng.randint(2, 6)
+        rs = _RegionSet("heat", Topology.generate(rows, cols))
+        on = [False] * (rows * cols)
+        for tick in range(30):
+            added, cleared = [], []
+            for k in rng.sample(range(rows * cols), max(1, rows * cols // 3)):
+                want = rng.random() < 0.6
+                if want != on[k]:
+                    (added if want else cleared).append(k)
+                    on[k] = want
+            rs.apply(added, cleared, [], tick)
+            rs._compact()  # normally only once slots pile up; here every tick
+
+            assert _regions(rs) == _components(on, rows, cols), (seed, tick)
+            assert set(rs.region_id) == set(rs.members) == set(rs.born)
+            for root, cells in rs.members.items():
+                assert all(rs.find(k) == root for k in cells)
+
+
+def test_split_keeps_id_on_one_piece_and_merge_keeps_larger_id():
+    rs = _RegionSet("heat", Topology.generate(3, 7))
+    row = [7 + c for c in range(7)]  # middle row
+    rs.apply(row, [], [], 0)
+    (rid,) = rs.region_id.values()
+
+    rs.apply([], [10], [], 1)  # cut the bar in two
+    assert _regions(rs) == {frozenset(row[:3]), frozenset(row[4:])}
+    ids = sorted(rs.region_id.values())
+    assert rid in ids and len(ids) == 2
+    assert all(rs.born[root] == 0 for root in rs.members)
+
+    rs.apply([0, 1, 2], [], [], 2)  # grow the left piece to 6 cells
+    left_id = rs.region_id[rs.find(7)]
+    rs.apply([10], [], [], 3)  # bridge: the larger (left) region's id survives
+    assert _regions(rs) == {frozenset(row + [0, 1, 2])}
+    assert list(rs.region_id.values()) == [left_id]
+    assert rs.born[rs.find(7)] == 0
+
+
+def test_region_alerts_stay_exact_with_dirty_tracking():
+    rows, cols = 10, 12
+    topo = Topology.generate(rows, cols)
+    regions = HazardRegions(topo)
+    rng = random.Random(3)
+    values = [rng.uniform(95, 115) for _ in range(rows * cols)]
+    for tick in range(60):
+        for k in rng.sample(range(rows * cols), 30):
+            values[k] = min(125.0, max(90.0, values[k] + rng.uniform(-6, 6)))
+        regions.update([
+            {"index": k, "int_id": intersection_id(k), "heat_index_f": v, "visibility_ft": 5000.0}
+            for k, v in enumerate(values)
+        ], tick)
+
+        on = [v >= REGION_HEAT_F for v in values]
+        assert _regions(regions.heat) == _components(on, rows, cols)
+        if tick >= SUSTAIN_TICKS:
+            assert regions.active_alerts
+        for rid, alert in regions.active_alerts.items():
+            rs = regions.heat
+            (root,) = [root for root, r in rs.region_id.items() if r == rid]
+            cells = rs.members[root]
+            peak = max(values[k] for k in cells)
+            region = alert.region
+            assert region.member_count == len(cells)
+            assert region.peak_value == round(peak, 1)
+            assert values[int(region.peak_int_id[4:]) - 1] == peak
+            assert (region.extent.row_min, region.extent.row_max) == (
+                min(k // cols for k in cells), max(k // cols for k in cells))
+            assert (region.extent.col_min, region.extent.col_max) == (
+                min(k % cols for k in cells), max(k % cols for k in cells))
@@ -0,0 +1,106 @@
+import asyncio
+import os
+
+import pytest
+
+import simulation_loop
+from models import InstanceConfig
+from simulation_loop import SimulationRegistry
+from tick_log import TickLogWriter
+
+
+@pytest.fixture
+def tick_log_writer(tmp_path):
+    writer = TickLogWriter(str(tmp_path))
+    writer.start()
+    simulation_loop._tick_log = writer
+    try:
+        yield writer
+    finally:
+        simulation_loop._tick_log = None
+        writer.close()
+
+
+def test_reserved_instance_is_invisible_until_registered():
+    registry = SimulationRegistry()
+    sim = registry.create(InstanceConfig(id="lab-a"), register=False)
+    assert registry.get("lab-a") is None
+    with pytest.raises(ValueError):
+        registry.create(InstanceConfig(id="lab-a"))
+
+    asyncio.run(sim.tick())
+    registry.register(sim)
+    assert registry.get("lab-a") is sim
+    assert sim.tick_count == 1
+
+    registry.release("lab-b")  # unknown ids are ignored
+    other = registry.create(InstanceConfig(id="lab-b"), register=False)
+    registry.release(other.id)
+    assert registry.create(InstanceConfig(id="lab-b")).id == "lab-b"
+
+
+def test_create_rejects_unknown_scenario():
+    with pytest.raises(ValueError):
+        SimulationRegistry().create(InstanceConfig(id="lab-c", scenario="monsoon"))
+
+
+def test_create_caps_generated_grids():
+    with pytest.raises(ValueError):
+        SimulationRegistry().create(InstanceConfig(id="lab-big", rows=1000, cols=1000))
+
+
+def test_remove_wakes_parked_waiters():
+    registry = SimulationRegistry()
+    sim = registry.create(InstanceConfig(id="lab-f"))
+
+    async def run():
+        waiter = asyncio.create_task(sim.wait_for_tick(sim.tick_count))
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        await registry.remove("lab-f")
+        await asyncio.wait_for(waiter, 1)
+
+    asyncio.run(run())
+    assert sim.closed
+
+
+def test_remove_deletes_checkpoints_and_tick_log(tick_log_writer):
+    registry = SimulationRegistry()
+    sim = registry.create(InstanceConfig(id="lab-d"))
+
+    async def run():
+        for _ in range(5):  # the 5th tick starts a checkpoint write
+            await sim.tick()
+        assert sim._checkpoint_task is not None
+        return await registry.remove("lab-d")
+
+    assert asyncio.run(run())
+    assert registry.get("lab-d") is None
+    assert sim._checkpoint_task.done()
+    assert not os.path.exists(sim.checkpoint_dir)
+    assert not os.path.exists(sim.tick_log_dir)
+    assert sim.tick_log_dir not in tick_log_writer._files
+
+    # A new instance with the same id starts cold
+    fresh = registry.create(InstanceConfig(id="lab-d"))
+    assert not fresh.restore()
+    assert fresh.tick_count == 0
+
+
+def test_removed_instance_drops_late_ticks():
+    registry = SimulationRegistry()
+    sim = registry.create(InstanceConfig(id="lab-e"))
+
+    async def run():
+        result = await asyncio.get_running_loop().run_in_executor(simulation_loop.executor, sim.compute_tick)
+        await registry.remove("lab-e")
+        await sim.finish_tick(result)  # a scheduler round that was already computing
+
+    asyncio.run(run())
+    assert sim.tick_count == 0
+    assert not os.path.exists(sim.checkpoint_dir)
+
+
+def test_default_instance_cannot_be_removed():
+    with pytest.raises(ValueError):
+        asyncio.run(simulation_loop.registry.remove("default"))
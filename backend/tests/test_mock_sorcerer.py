@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+
+import pytest
+
+from mock_sorcerer import AtmosphericField
+
+
+def _grid(*points):
+    """A bare topology: just the node coordinates sample() reads."""
+    return SimpleNamespace(lat=[p[0] for p in points], lng=[p[1] for p in points], n_nodes=len(points))
+
+
+def _field():
+    # 3x3 lattice over lat/lng 0..2, so lattice point (r, c) sits at lat r, lng c
+    field = AtmosphericField(0.0, 2.0, 0.0, 2.0, rows=3, cols=3)
+    field.values = {"v": [10.0 * r + c for r in range(3) for c in range(3)]}
+    return field
+
+
+def test_node_on_a_lattice_point_takes_its_value():
+    grid = _grid((0, 0), (1, 2), (2, 1), (2, 2))
+    assert _field().sample(grid, "v") == pytest.approx([0, 12, 21, 22])
+
+
+def test_midpoints_average_their_neighbours():
+    grid = _grid((0.5, 0.5), (1, 1.5), (1.5, 2))
+    # (0 + 1 + 10 + 11) / 4, (11 + 12) / 2, (12 + 22) / 2
+    assert _field().sample(grid, "v") == pytest.approx([5.5, 11.5, 17])
+
+
+def test_nodes_outside_the_lattice_clamp_to_its_edge():
+    assert _field().sample(_grid((-1, 1), (3, 5)), "v") == pytest.approx([1, 22])
+
+
+def test_weights_are_cached_per_topology_and_range():
+    field, grid = _field(), _grid((0, 0), (1, 1), (2, 2))
+    weights = field._node_weights(grid, 0, 3)
+    assert field._node_weights(grid, 0, 3) is weights
+    field.values = {"v": [1.0] * 9}  # new values reuse the weights
+    assert field.sample(grid, "v") == pytest.approx([1, 1, 1])
+    assert field._weights[3] is weights
+
+    # A different node range or grid rebuilds them
+    assert field.sample(grid, "v", 1, 3) == pytest.approx([1, 1])
+    assert field._weights[3] is not weights and len(field._weights[3]) == 2
+    moved = _grid((0, 0), (1, 1), (2, 2))
+    assert field._node_weights(moved, 0, 3) is not weights
+    assert field._weights[0] is moved
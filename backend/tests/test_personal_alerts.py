@@ -0,0 +1,113 @@
+import random
+
+from models import SubscriberProfile
+from personal_alerts import SubscriberRegistry, _ThresholdIndex, fog_limit, heat_limit
+
+
+def _brute_active(registry, values):
+    """(int_id, hazard) pairs each subscriber should currently be alerted on."""
+    out = {}
+    for sub_id, sub in registry.subscribers.items():
+        watched = set(sub.intersections)
+        out[sub_id] = {
+            (int_id, hazard)
+            for int_id, (hi, vis) in values.items() if not watched or int_id in watched
+            for hazard, over in (("heat", hi >= heat_limit(sub)), ("fog", vis <= fog_limit(sub)))
+            if over
+        }
+    return out
+
+
+def test_threshold_index_finds_exactly_the_crossed_limits():
+    rng = random.Random(2)
+    index = _ThresholdIndex()
+    limits = {f"s{j}": rng.choice((100.0, 104.5, 105.0, 110.0, rng.uniform(95, 115))) for j in range(40)}
+    for sub_id, limit in limits.items():
+        index.add(limit, sub_id)
+    index.remove(limits.pop("s7"), "s7")
+    assert index.limits == sorted(index.limits) and "s7" not in index.ids
+
+    for _ in range(200):
+        prev, cur = rng.uniform(95, 115), rng.choice((100.0, 105.0, rng.uniform(95, 115)))
+        over, clear = index.heat_changes(prev, cur)
+        assert set(over) == {s for s, lim in limits.items() if prev < lim <= cur}
+        assert set(clear) == {s for s, lim in limits.items() if cur < lim <= prev}
+        over, clear = index.fog_changes(prev, cur)
+        assert set(over) == {s for s, lim in limits.items() if cur <= lim < prev}
+        assert set(clear) == {s for s, lim in limits.items() if prev <= lim < cur}
+
+
+def test_registry_tracks_crossings_like_a_full_scan():
+    rng = random.Random(5)
+    int_ids = [f"int_{k}" for k in range(1, 13)]
+    registry = SubscriberRegistry()
+    tokens = {}
+    for _ in range(25):
+        profile = SubscriberProfile(
+            heat_weight=rng.uniform(0, 100), fog_weight=rng.uniform(0, 100),
+            intersections=rng.sample(int_ids, rng.choice((0, 1, 3))),
+        )
+        sub, token, initial = registry.add(profile)
+        assert initial == []  # nothing evaluated yet
+        tokens[sub.id] = token
+
+    values = {}
+    for tick in range(80):
+        for int_id in rng.sample(int_ids, 6):
+            values[int_id] = (rng.uniform(95, 115), rng.uniform(100, 1200))
+        events = registry.evaluate([
+            {"int_id": int_id, "name": int_id, "heat_index_f": hi, "visibility_ft": vis}
+            for int_id, (hi, vis) in values.items()
+        ])
+        expected = _brute_active(registry, values)
+        for sub_id in registry.subscribers:
+            assert set(registry.active[sub_id]) == expected[sub_id], tick
+        for sub_id, alerts in events.items():
+            assert all(a.subscriber_id == sub_id for a in alerts)
+
+        if tick == 40:
+            gone = next(iter(registry.subscribers))
+            assert registry.remove(gone)
+            assert not registry.check_token(gone, tokens[gone])
+
+    # A late subscriber gets the limits already crossed as its first alerts
+    sub, token, initial = registry.add(SubscriberProfile(heat_threshold_f=95, heat_weight=0))
+    assert {(a.node_id, a.hazard) for a in initial} == _brute_active(registry, values)[sub.id]
+    assert registry.check_token(sub.id, token)
+    assert not registry.check_token(sub.id, "wrong")
+    assert not registry.check_token(sub.id, None)
+
+
+def test_idle_subscribers_expire_unless_renewed():
+    registry = SubscriberRegistry()
+    idle, _, _ = registry.add(SubscriberProfile(), tick=0)
+    kept, _, _ = registry.add(SubscriberProfile(), tick=0)
+    late, _, _ = registry.add(SubscriberProfile(), tick=8)
+    registry.touch(kept.id, 9)
+    registry.touch("gone", 9)  # unknown ids don't get a lease
+
+    assert registry.expire(before_tick=5) == [idle.id]
+    assert set(registry.subscribers) == {kept.id, late.id}
+    assert "gone" not in registry.seen
+    assert idle.id not in registry.tokens and idle.id not in registry.active
+
+
+def test_connected_subscribers_keep_their_lease():
+    import asyncio
+
+    import simulation_loop
+    from models import InstanceConfig
+    from simulation_loop import AppState
+
+    state = AppState(InstanceConfig(id="leases"))
+    connected, _, _ = state.subscribers.add(SubscriberProfile(), tick=0)
+    idle, _, _ = state.subscribers.add(SubscriberProfile(), tick=0)
+    state.subscriber_ws[connected.id] = {object()}  # a socket; no pushes happen here
+
+    async def run(ticks):
+        for _ in range(ticks):
+            await state.tick()
+
+    asyncio.run(run(simulation_loop.SUBSCRIBER_IDLE_TICKS + simulation_loop._EXPIRE_EVERY_TICKS + 1))
+    assert connected.id in state.subscribers.subscribers
+    assert idle.id not in state.subscribers.subscribers
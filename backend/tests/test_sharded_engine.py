@@ -0,0 +1,96 @@
+import heapq
+
+import pytest
+
+from alert_engine import group_intersections
+from models import SensorReading
+from sharded_engine import ShardedEngine
+from topology import CORNERS, Topology
+
+
+@pytest.fixture(scope="module")
+def engine():
+    engine = ShardedEngine(Topology.generate(12, 10), shards=3, seed=1, serve=8)
+    try:
+        for tick in range(4):
+            engine.tick("dense_tule_fog", tick)
+        yield engine
+    finally:
+        engine.close()
+
+
+def _all_readings(engine):
+    temp, hum, vis, hi = (engine.column(c) for c in ("temp_f", "humidity", "visibility_ft", "heat_index_f"))
+    topo = engine.topology
+    return [
+        SensorReading(node_id=topo.node_id(i), name=topo.node_name(i), lat=topo.lat[i], lng=topo.lng[i],
+                      zone=topo.zone_name(i // CORNERS), temp_f=temp[i], humidity=hum[i],
+                      visibility_ft=vis[i], heat_index_f=hi[i], timestamp=engine.timestamp)
+        for i in range(engine.n)
+    ]
+
+
+def test_intersections_match_group_intersections(engine):
+    assert engine.intersections() == group_intersections(_all_readings(engine), engine.topology)
+
+
+def test_only_riskiest_and_alerted_intersections_are_served(engine):
+    risk = engine.int_column("combined_risk")
+    combined = engine.column("combined_risk")
+    for k in range(engine.n_int):
+        assert risk[k] == max(combined[k * CORNERS:(k + 1) * CORNERS])
+
+    top = set(heapq.nlargest(8, range(engine.n_int), key=risk.__getitem__))
+    alerted = {int(key.split(":")[0][4:]) - 1 for key in engine.alerts.active_alerts}
+    assert engine.served == sorted(top | alerted)
+
+    readings = engine.readings()
+    risks = engine.risks(readings)
+    assert len(readings) == len(risks) == CORNERS * len(engine.served)
+    assert {r.node_id for r in readings} == {r.node_id for r in risks}
+    assert {engine.topology.node_index(r.node_id) // CORNERS for r in readings} == set(engine.served)
+
+
+def test_sharded_tick_log_records_every_node_in_one_segment(tmp_path):
+    import tick_log
+    from models import InstanceConfig
+    from simulation_loop import AppState
+    from tick_log import TickLogWriter, read_ticks
+
+    state = AppState(InstanceConfig(id="shard-log", scenario="dense_tule_fog", rows=6, cols=5))
+    assert state.start_sharded_engine(2)
+    state.engine.serve = 3  # served subset changes from tick to tick
+    writer = TickLogWriter(str(tmp_path))
+    writer.start()
+    try:
+        for _ in range(6):
+            state.apply_tick(state.compute_tick())
+            writer.append(tick_log.capture(state, []), str(tmp_path))
+    finally:
+        writer.close()
+        state.engine.close()
+
+    assert len(list(tmp_path.glob("seg_*.tlog"))) == 1
+    records = list(read_ticks(str(tmp_path)))
+    assert [r.tick for r in records] == list(range(1, 7))
+    last = records[-1]
+    assert last.node_ids == [state.topology.node_id(i) for i in range(state.topology.n_nodes)]
+    # Replay sees the whole grid in node order, as group_intersections expects
+    readings = tick_log.TickReplayer(state.topology, str(tmp_path)).readings(last)
+    assert len(readings) == state.topology.n_nodes
+
+
+def _run_shards(shards):
+    engine = ShardedEngine(Topology.generate(12, 10), shards=shards, seed=1, serve=8)
+    try:
+        for tick in range(8):
+            engine.tick("dense_tule_fog" if tick < 2 else "heat_wave", tick)
+        return bytes(engine._shm.buf[:engine._shm.size]), sorted(engine.alerts.active_alerts)
+    finally:
+        engine.close()
+
+
+def test_results_are_identical_for_any_shard_count():
+    columns, alerts = _run_shards(1)
+    assert alerts
+    assert _run_shards(3) == (columns, alerts)
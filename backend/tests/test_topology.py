@@ -0,0 +1,89 @@
+import pickle
+
+import pytest
+
+from config import DAVIS_GRID
+from topology import CORNERS, Topology
+
+
+def _baseline_davis_nodes():
+    """The Davis node table exactly as config.INTERSECTIONS built it before topology.py."""
+    anchor, north, east = (38.5431, -121.7437), (0.001280, -0.000350), (0.000189, 0.001103)
+    streets = ["B", "C", "D", "E", "F", "G"]
+    rows = [("2nd", 0.0), ("2nd-3rd", 0.5), ("3rd", 1.0), ("3rd-4th", 1.5),
+            ("4th", 2.0), ("4th-5th", 2.5), ("5th", 3.0), ("5th-6th", 3.5)]
+    offsets = [("NW", +0.00013, -0.00017), ("NE", +0.00013, +0.00017),
+               ("SW", -0.00013, -0.00017), ("SE", -0.00013, +0.00017)]
+    centers = []
+    for ew, r in rows:
+        for c, ns in enumerate(streets):
+            lat = round(anchor[0] + r * north[0] + c * east[0], 6)
+            lng = round(anchor[1] + r * north[1] + c * east[1], 6)
+            centers.append((f"{ew} & {ns} St", lat, lng))
+    nodes = []
+    for i, (name, lat, lng) in enumerate(centers, start=1):
+        for j, (corner, dlat, dlng) in enumerate(offsets, start=1):
+            nodes.append((f"node_{(i - 1) * 4 + j:03d}", f"{name} — {corner}",
+                          round(lat + dlat, 4), round(lng + dlng, 4)))
+    return nodes
+
+
+def test_davis_grid_reproduces_the_baseline_nodes():
+    topo = Topology.from_definition(DAVIS_GRID)
+    assert topo.n_nodes == 192
+    actual = [(topo.node_id(i), topo.node_name(i), topo.lat[i], topo.lng[i]) for i in range(topo.n_nodes)]
+    assert actual == _baseline_davis_nodes()
+    assert {topo.zone_name(k) for k in range(topo.n_intersections)} == {"downtown"}
+
+
+def test_from_definition_counts_labels_and_districts():
+    topo = Topology.from_definition({
+        "anchor": [0, 0], "north": [1, 0], "east": [0, 1],
+        "rows": 3, "cols": ["A", "B"], "default_zone": "north",
+        "districts": [{"zone": "campus", "rows": [0, 2]}, {"zone": "south", "rows": [0, 1], "cols": [1, 2]}],
+    })
+    assert (topo.rows, topo.cols, topo.n_nodes) == (3, 2, 3 * 2 * CORNERS)
+    assert topo.intersection_name(5) == "R2 & B"
+    # Later districts win where they overlap; omitted ranges span the grid
+    assert [topo.zone_name(k) for k in range(6)] == ["campus", "south", "campus", "campus", "north", "north"]
+    # Corner nodes sit around their intersection's centre
+    assert topo.lat[4 * CORNERS] == pytest.approx(2.0001, abs=1e-4)
+
+
+def test_generate_tiles_districts_from_the_south_west():
+    topo = Topology.generate(4, 6, ["downtown", "campus", "south"])
+    zones = [[topo.zone_name(r * 6 + c) for c in range(6)] for r in range(4)]
+    # 3 districts -> 2x2 tiles; the last district takes the rest of its tile row
+    assert zones[0] == ["downtown"] * 3 + ["campus"] * 3
+    assert zones[1] == zones[0]
+    assert zones[2] == zones[3] == ["south"] * 6
+    assert Topology.generate(2, 2, []).zones == ["downtown"]
+
+
+def test_node_index_inverts_node_id():
+    topo = Topology.generate(30, 30)  # 3,600 nodes: ids are 4 digits wide
+    for i in (0, 41, topo.n_nodes - 1):
+        assert topo.node_index(topo.node_id(i)) == i
+    assert topo.node_id(0) == "node_0001"
+    for bad in ("node_001", "node_0000", f"node_{topo.n_nodes + 1}", "int_01", "node_x"):
+        assert topo.node_index(bad) is None
+
+
+def test_tables_are_built_lazily_and_not_pickled():
+    topo = Topology.generate(3, 2)
+    assert "_latlng" not in topo.__dict__ and "zone" not in topo.__dict__
+    assert list(topo.row) == [0, 0, 1, 1, 2, 2]
+    assert list(topo.col) == [0, 1, 0, 1, 0, 1]
+    assert len(topo.lat) == len(topo.lng) == topo.n_nodes
+    assert "_latlng" in topo.__dict__
+
+    copy = pickle.loads(pickle.dumps(topo))
+    assert "_latlng" not in copy.__dict__
+    assert list(copy.lat) == list(topo.lat)
+
+
+def test_grid_size_is_validated():
+    with pytest.raises(ValueError):
+        Topology.generate(0, 5)
+    with pytest.raises(ValueError):
+        Topology.generate(1000, 1000)
@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+from models import InstanceConfig
+from simulation_loop import AppState
+
+
+def _ticked(scenario="heat_wave"):
+    state = AppState(InstanceConfig(id="views", scenario=scenario))
+    state.apply_tick(state.compute_tick())
+    return state
+
+
+def test_views_are_cached_per_tick_and_compose_the_snapshot():
+    state = _ticked()
+    sensors = state.view("sensors")
+    assert state.view("sensors") is sensors
+
+    snap = json.loads(state.payload())
+    assert snap["tick"] == 1
+    assert snap["sensors"] == json.loads(sensors)
+    assert snap["risks"] == [r.model_dump(mode="json") for r in state.risks]
+    assert state.sse_frame().startswith(b"id: 1\nevent: tick\ndata: ")
+
+    state.apply_tick(state.compute_tick())
+    assert state.view("sensors") is not sensors
+
+
+def test_top_risk_view_is_sorted_and_limited():
+    state = _ticked()
+    top = json.loads(state.view("top-risk:3"))
+    expected = sorted(state.risks, key=lambda r: r.combined_risk, reverse=True)[:3]
+    assert [r["node_id"] for r in top] == [r.node_id for r in expected]
+
+
+def test_invalidate_drops_stale_views():
+    state = _ticked()
+    assert json.loads(state.payload())["scenario"] == "heat_wave"
+    state.scenario = "light_fog"
+    state.invalidate()
+    assert json.loads(state.payload())["scenario"] == "light_fog"
+
+
+def test_computing_a_tick_does_not_change_the_published_one():
+    state = _ticked()
+    sensors = state.view("sensors")
+    published = [r.temp_f for r in state.risks]
+
+    result = state.compute_tick()  # a request arrives while the next tick computes
+    snap = json.loads(state.payload())
+    assert snap["tick"] == 1
+    assert snap["sensors"] == json.loads(sensors)
+    assert [r["temp_f"] for r in snap["risks"]] == published
+
+    state.apply_tick(result)
+    snap = json.loads(state.payload())
+    assert snap["tick"] == 2
+    assert [r["temp_f"] for r in snap["risks"]] == [r.temp_f for r in result.risks]
+    assert [s["temp_f"] for s in snap["sensors"]] == [r.temp_f for r in result.readings]
+
+
+def test_wait_for_tick_parks_only_on_the_current_tick():
+    state = _ticked()
+
+    async def run():
+        for since in (None, 0, 5):  # no tick given, an older one, one ahead (restart)
+            await asyncio.wait_for(state.wait_for_tick(since), 1)
+        waiter = asyncio.create_task(state.wait_for_tick(state.tick_count))
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        state.apply_tick(state.compute_tick())
+        state.publish_tick()
+        await asyncio.wait_for(waiter, 1)
+
+    asyncio.run(run())
+
+
+def test_sse_stream_resumes_after_last_event_id():
+    from routes.stream import stream
+
+    state = _ticked()
+
+    async def run():
+        # A reconnect that already has tick 1 waits for tick 2
+        events = (await stream(last_event_id="1", sim=state)).body_iterator
+        frame = asyncio.ensure_future(anext(events))
+        await asyncio.sleep(0)
+        assert not frame.done()
+        state.apply_tick(state.compute_tick())
+        state.publish_tick()
+        assert (await asyncio.wait_for(frame, 1)).startswith(b"id: 2\n")
+
+        # One that missed ticks gets the current snapshot straight away
+        events = (await stream(last_event_id="0", sim=state)).body_iterator
+        assert (await asyncio.wait_for(anext(events), 1)).startswith(b"id: 2\n")
+
+    asyncio.run(run())
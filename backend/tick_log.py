@@ -0,0 +1,373 @@
+"""Append-only binary tick log: writer thread, mmap reader, and replayer.
+
+Segments are named seg_<first tick>.tlog and rotate at TICK_LOG_SEGMENT_BYTES
+(or when the node list changes). Tick numbers keep increasing across restarts
+(see last_tick), so segment names sort in tick order. Layout, little-endian:
+
+    segment header  "<4sHI"     b"TLSG", version, ids_len  + node ids JSON
+    record header   "<4sIqdHII" b"TKRC", record length, tick, unix time,
+                                scenario_len, n_nodes, events_len
+                    "<6d"       wind mph, wind dir index, boundary layer m,
+                                dew point depression °F, fog prob, inversion
+                    "<HH"       atmospheric lattice rows, cols (v2+; 0 = none)
+                    lattice as float64, FIELD_VARS in order (v2+)
+                    scenario | temp_f, humidity, visibility_ft, heat_index_f
+                    as float32 columns | alert events JSON
+"""
+
+import json
+import logging
+import mmap
+import os
+import queue
+import shutil
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_right
+from datetime import datetime, timezone
+from typing import Iterator, NamedTuple, Optional
+
+from config import TICK_LOG_DIR, TICK_LOG_SEGMENT_BYTES
+from mock_sorcerer import FIELD_VARS, WIND_DIRS
+from models import SensorReading, SorcererAtmospheric
+from topology import CORNERS, Topology
+
+logger = logging.getLogger(__name__)
+
+SEG_MAGIC = b"TLSG"
+REC_MAGIC = b"TKRC"
+VERSION = 2  # 2: atmospheric lattice per record
+_SEG = struct.Struct("<4sHI")
+_REC = struct.Struct("<4sIqdHII")
+_ATM = struct.Struct("<6d")
+_FIELD = struct.Struct("<HH")
+COLUMNS = ("temp_f", "humidity", "visibility_ft", "heat_index_f")
+_SUFFIX = ".tlog"
+
+
+class TickRecord(NamedTuple):
+    tick: int
+    timestamp: float
+    scenario: str
+    atmospheric: Optional[tuple]  # the six "<6d" values, or None
+    node_ids: list[str]
+    columns: dict[str, array]
+    events: list[dict]
+    # (rows, cols, {FIELD_VARS name: values}) of the lattice; None before v2
+    field: Optional[tuple] = None
+
+    def sorcerer(self) -> Optional[SorcererAtmospheric]:
+        if self.atmospheric is None:
+            return None
+        wind, wind_dir, blh, dpd, fog_p, inv = self.atmospheric
+        return SorcererAtmospheric(
+            wind_speed_mph=wind, wind_direction=WIND_DIRS[int(wind_dir)],
+            boundary_layer_height_m=blh, dew_point_depression_f=dpd,
+            fog_probability=fog_p, inversion_strength=inv,
+            timestamp=datetime.fromtimestamp(self.timestamp, timezone.utc),
+        )
+
+
+def alert_events(before: dict, after: dict) -> list[dict]:
+    """Fired / resolved events between two AlertEngine.active_alerts maps."""
+    events = [{"event": "fired", "key": k, **a.model_dump(mode="json")} for k, a in after.items() if k not in before]
+    events += [{"event": "resolved", "key": k, "id": a.id} for k, a in before.items() if k not in after]
+    return events
+
+
+def capture(state, events: list[dict]) -> tuple:
+    """Everything the writer needs, copied on the loop. Encoding happens off it."""
+    readings, atm, field = state.readings, state.atmospheric, state.field
+    values = state.field_values
+    atm_values = None
+    if atm is not None:
+        atm_values = (
+            atm.wind_speed_mph, WIND_DIRS.index(atm.wind_direction), atm.boundary_layer_height_m,
+            atm.dew_point_depression_f, atm.fog_probability, atm.inversion_strength,
+        )
+    if state.engine:
+        # Sharded: readings only cover the served intersections, so log every
+        # node straight from the shared columns. They still hold the tick
+        # being published: the next one can't start until this one finishes.
+        node_ids = state.engine.node_ids
+        columns = {name: array("d", state.engine.column(name)) for name in COLUMNS}
+    else:
+        node_ids = [r.node_id for r in readings]
+        columns = {name: [getattr(r, name) for r in readings] for name in COLUMNS}
+    return (
+        state.tick_count,
+        readings[0].timestamp.timestamp() if readings else datetime.now(timezone.utc).timestamp(),
+        state.scenario,
+        atm_values,
+        node_ids,
+        columns,
+        events,
+        (field.rows, field.cols, values) if values else None,
+    )
+
+
+def _le(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def encode_record(entry: tuple) -> bytes:
+    tick, ts, scenario, atm, node_ids, columns, events, field = entry
+    scenario_b = scenario.encode()
+    events_b = json.dumps(events, separators=(",", ":")).encode() if events else b""
+    rows, cols, values = field if field is not None else (0, 0, None)
+    body = b"".join([
+        _ATM.pack(*(atm if atm is not None else (float("nan"),) * 6)),
+        _FIELD.pack(rows, cols),
+        *(_le(array("d", values[name])) for name in FIELD_VARS if values is not None),
+        scenario_b,
+        *(_le(array("f", columns[name])) for name in COLUMNS),
+        events_b,
+    ])
+    header = _REC.pack(REC_MAGIC, _REC.size + len(body), tick, ts, len(scenario_b), len(node_ids), len(events_b))
+    return header + body
+
+
+class TickLogWriter:
+    """Background writer; append() never blocks the event loop.
+
+    One writer thread serves every simulation instance: each append names
+    the log directory it belongs to, and each directory has its own open
+    segment.
+    """
+
+    def __init__(self, directory: str = TICK_LOG_DIR, segment_bytes: int = TICK_LOG_SEGMENT_BYTES):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self._queue: queue.Queue = queue.Queue(maxsize=1024)
+        self._files: dict[str, tuple] = {}  # directory -> (open segment, its node ids)
+        self._thread = threading.Thread(target=self._run, name="tick-log-writer", daemon=True)
+        self._dropped = 0
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._thread.start()
+
+    def append(self, entry: tuple, directory: Optional[str] = None):
+        try:
+            self._queue.put_nowait((directory or self.directory, entry))
+        except queue.Full:
+            self._dropped += 1
+            if self._dropped == 1 or self._dropped % 100 == 0:
+                logger.warning("Tick log writer behind; dropped %d ticks", self._dropped)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join(timeout=10)
+
+    def remove_directory(self, directory: str):
+        """Close `directory`'s open segment and delete the log, once every
+        append queued before this call is written. Blocking."""
+        if not self._thread.is_alive():
+            shutil.rmtree(directory, True)
+            return
+        done = threading.Event()
+        self._queue.put((directory, done))
+        done.wait(timeout=10)
+
+    def _rotate(self, directory: str, tick: int, node_ids: list[str]):
+        current = self._files.pop(directory, None)
+        if current:
+            current[0].close()
+        os.makedirs(directory, exist_ok=True)
+        # Never append to an existing segment (e.g. a log from before tick
+        # numbers carried across restarts)
+        path = os.path.join(directory, f"seg_{tick:012d}{_SUFFIX}")
+        k = 1
+        while os.path.exists(path):
+            path = os.path.join(directory, f"seg_{tick:012d}_{k}{_SUFFIX}")
+            k += 1
+        f = open(path, "xb")
+        ids_b = json.dumps(node_ids, separators=(",", ":")).encode()
+        f.write(_SEG.pack(SEG_MAGIC, VERSION, len(ids_b)) + ids_b)
+        self._files[directory] = (f, node_ids)
+        return f
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            directory, entry = item
+            if isinstance(entry, threading.Event):  # remove_directory()
+                current = self._files.pop(directory, None)
+                if current:
+                    current[0].close()
+                shutil.rmtree(directory, True)
+                entry.set()
+                continue
+            try:
+                record = encode_record(entry)
+                tick, node_ids = entry[0], entry[4]
+                f, seg_ids = self._files.get(directory, (None, None))
+                if (f is None or (node_ids is not seg_ids and node_ids != seg_ids)
+                        or f.tell() + len(record) > self.segment_bytes):
+                    f = self._rotate(directory, tick, node_ids)
+                f.write(record)
+                f.flush()
+            except OSError as exc:
+                logger.warning("Tick log write failed: %s", exc)
+        for f, _ in self._files.values():
+            f.close()
+
+
+def _segments(directory: str) -> list[tuple[int, str]]:
+    try:
+        names = sorted(n for n in os.listdir(directory) if n.startswith("seg_") and n.endswith(_SUFFIX))
+    except FileNotFoundError:
+        return []
+    return [(int(n[4:16]), os.path.join(directory, n)) for n in names]
+
+
+def _iter_segment(path: str, start_tick: Optional[int], end_tick: Optional[int]) -> Iterator[TickRecord]:
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < _SEG.size:
+            return
+        with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as mm:
+            magic, version, ids_len = _SEG.unpack_from(mm, 0)
+            if magic != SEG_MAGIC or not 1 <= version <= VERSION:
+                logger.warning("Skipping unknown tick log segment %s", path)
+                return
+            node_ids = json.loads(mm[_SEG.size:_SEG.size + ids_len])
+            pos = _SEG.size + ids_len
+            while pos + _REC.size <= size:
+                magic, length, tick, ts, scen_len, n, ev_len = _REC.unpack_from(mm, pos)
+                if magic != REC_MAGIC or pos + length > size:
+                    break  # torn tail from an unclean shutdown
+                if end_tick is not None and tick > end_tick:
+                    return
+                if start_tick is None or tick >= start_tick:
+                    off = pos + _REC.size
+                    atm = _ATM.unpack_from(mm, off)
+                    off += _ATM.size
+                    field = None
+                    if version >= 2:
+                        rows, cols = _FIELD.unpack_from(mm, off)
+                        off += _FIELD.size
+                        if rows:
+                            m = rows * cols
+                            lattice = array("d")
+                            lattice.frombytes(mm[off:off + 8 * m * len(FIELD_VARS)])
+                            if sys.byteorder == "big":
+                                lattice.byteswap()
+                            field = (rows, cols, {name: lattice[j * m:(j + 1) * m].tolist()
+                                                  for j, name in enumerate(FIELD_VARS)})
+                            off += 8 * m * len(FIELD_VARS)
+                    scenario = mm[off:off + scen_len].decode()
+                    off += scen_len
+                    columns = {}
+                    for name in COLUMNS:
+                        col = array("f")
+                        col.frombytes(mm[off:off + 4 * n])
+                        if sys.byteorder == "big":
+                            col.byteswap()
+                        columns[name] = col
+                        off += 4 * n
+                    events = json.loads(mm[off:off + ev_len]) if ev_len else []
+                    yield TickRecord(tick, ts, scenario, None if atm[0] != atm[0] else atm,
+                                     node_ids, columns, events, field)
+                pos += length
+
+
+def read_ticks(directory: str = TICK_LOG_DIR, start_tick: Optional[int] = None,
+               end_tick: Optional[int] = None) -> Iterator[TickRecord]:
+    """Records in [start_tick, end_tick], one at a time, straight from mmap."""
+    segments = _segments(directory)
+    if start_tick is not None:
+        # The segment containing start_tick is the last one starting at or before it
+        first = max(0, bisect_right([t for t, _ in segments], start_tick) - 1)
+        segments = segments[first:]
+    for seg_tick, path in segments:
+        if end_tick is not None and seg_tick > end_tick:
+            break
+        yield from _iter_segment(path, start_tick, end_tick)
+
+
+def last_tick(directory: str = TICK_LOG_DIR) -> Optional[int]:
+    """Tick of the newest complete record in the log, or None if it is empty.
+
+    Only record headers are read. A restarted instance continues numbering
+    after it, so new segments sort after the old ones.
+    """
+    for _, path in reversed(_segments(directory)):
+        last = None
+        try:
+            with open(path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if size < _SEG.size:
+                    continue
+                with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as mm:
+                    magic, version, ids_len = _SEG.unpack_from(mm, 0)
+                    if magic != SEG_MAGIC:
+                        continue
+                    pos = _SEG.size + ids_len
+                    while pos + _REC.size <= size:
+                        magic, length, tick = _REC.unpack_from(mm, pos)[:3]
+                        if magic != REC_MAGIC or pos + length > size:
+                            break
+                        last = tick
+                        pos += length
+        except OSError as exc:
+            logger.warning("Can't read tick log segment %s: %s", path, exc)
+        if last is not None:
+            return last
+    return None
+
+
+class TickReplayer:
+    """Feeds logged ticks back through the live pipeline, `speed` per live tick."""
+
+    def __init__(self, topology: Topology, directory: str = TICK_LOG_DIR,
+                 start_tick: Optional[int] = None, speed: int = 1):
+        self.topology = topology
+        self.directory = directory
+        self.start_tick = start_tick
+        self.speed = max(1, speed)
+        # Monotonic replay clock for alert debouncing; logged tick numbers
+        # jump backwards when the replay wraps around.
+        self.clock = 0
+        self._records = None
+
+    def advance(self) -> list[tuple[int, TickRecord]]:
+        """Next `speed` (clock, record) pairs; wraps to the start when the log runs out."""
+        out = []
+        for _ in range(2):  # at most one wrap per call
+            if self._records is None:
+                self._records = read_ticks(self.directory, self.start_tick)
+            for rec in self._records:
+                self.clock += 1
+                out.append((self.clock, rec))
+                if len(out) == self.speed:
+                    return out
+            self._records = None
+            if out:
+                break
+        return out
+
+    def readings(self, rec: TickRecord) -> list[SensorReading]:
+        ts = datetime.fromtimestamp(rec.timestamp, timezone.utc)
+        cols = rec.columns
+        topo = self.topology
+        readings = []
+        for i, nid in enumerate(rec.node_ids):
+            j = topo.node_index(nid)
+            if j is None:
+                continue
+            readings.append(SensorReading(
+                node_id=nid, name=topo.node_name(j), lat=topo.lat[j], lng=topo.lng[j],
+                zone=topo.zone_name(j // CORNERS),
+                temp_f=round(cols["temp_f"][i], 1), humidity=round(cols["humidity"][i], 1),
+                visibility_ft=round(cols["visibility_ft"][i], 0), heat_index_f=round(cols["heat_index_f"][i], 1),
+                timestamp=ts,
+            ))
+        return readings
@@ -0,0 +1,223 @@
+"""Grid topology: rows x cols intersections with 4 corner sensor nodes each.
+
+A topology comes from a grid definition — the built-in Davis grid, a JSON
+file, or generate() parameters — and costs nothing until first use. The node
+table is then built once as flat arrays (lat/lng per node; row, col and zone
+per intersection) and shared by every engine running on that grid. Node ids
+and names are computed from indices, never stored per node.
+
+Node i belongs to intersection i // 4 and is corner CORNER_NAMES[i % 4];
+intersection k sits at row k // cols, col k % cols (row 0 = south edge,
+col 0 = west edge).
+
+Definition (JSON file or dict):
+    {"name": "...", "anchor": [lat, lng],
+     "north": [dlat, dlng], "east": [dlat, dlng],     # one row / col step
+     "rows": 8 or ["2nd", ...], "cols": 6 or ["B St", ...],
+     "default_zone": "downtown",
+     "districts": [{"zone": "campus", "rows": [0, 4], "cols": [0, 3]}, ...]}
+District row/col ranges are half-open; later districts win where they overlap.
+"""
+
+import json
+import math
+from array import array
+from functools import cached_property, lru_cache
+from typing import Optional, Sequence
+
+from config import DAVIS_GRID, GRID_FILE, MAX_GRID_NODES
+
+CORNERS = 4  # nodes per intersection
+# Intersection corner offsets (~15 m, tight clustering)
+_OFFSETS = (
+    ("NW", +0.00013, -0.00017),
+    ("NE", +0.00013, +0.00017),
+    ("SW", -0.00013, -0.00017),
+    ("SE", -0.00013, +0.00017),
+)
+CORNER_NAMES = tuple(corner for corner, _, _ in _OFFSETS)
+
+
+def intersection_id(k: int) -> str:
+    return f"int_{k + 1:02d}"
+
+
+class Topology:
+    def __init__(
+        self,
+        rows: int,
+        cols: int,
+        anchor: Sequence[float],
+        north: Sequence[float],
+        east: Sequence[float],
+        row_labels: Optional[Sequence[str]] = None,
+        col_labels: Optional[Sequence[str]] = None,
+        districts: Sequence[tuple] = (),
+        default_zone: str = "downtown",
+        name: str = "grid",
+    ):
+        if rows < 1 or cols < 1:
+            raise ValueError("A grid needs at least one row and one column")
+        if rows * cols * CORNERS > MAX_GRID_NODES:
+            raise ValueError(f"Grid is limited to {MAX_GRID_NODES:,} nodes")
+        self.name = name
+        self.rows, self.cols = rows, cols
+        self.anchor, self.north, self.east = tuple(anchor), tuple(north), tuple(east)
+        self.row_labels = list(row_labels) if row_labels else None
+        self.col_labels = list(col_labels) if col_labels else None
+        self.districts = [tuple(d) for d in districts]  # (zone, row0, row1, col0, col1)
+        self.default_zone = default_zone
+        if len({default_zone, *(d[0] for d in self.districts)}) > 0xFFFF:
+            raise ValueError("A grid is limited to 65,535 distinct zones")
+        self.n_intersections = rows * cols
+        self.n_nodes = self.n_intersections * CORNERS
+        self._id_width = max(3, len(str(self.n_nodes)))
+
+    @classmethod
+    def from_definition(cls, d: dict) -> "Topology":
+        rows, cols = d["rows"], d["cols"]
+        row_labels = rows if isinstance(rows, list) else None
+        col_labels = cols if isinstance(cols, list) else None
+        n_rows = len(rows) if row_labels else int(rows)
+        n_cols = len(cols) if col_labels else int(cols)
+        districts = [
+            (z["zone"], *z.get("rows", (0, n_rows)), *z.get("cols", (0, n_cols)))
+            for z in d.get("districts", [])
+        ]
+        return cls(
+            n_rows, n_cols, d["anchor"], d["north"], d["east"], row_labels, col_labels,
+            districts, d.get("default_zone", "downtown"), d.get("name", "grid"),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "Topology":
+        with open(path) as f:
+            return cls.from_definition(json.load(f))
+
+    @classmethod
+    def generate(cls, rows: int, cols: int, districts: Sequence[str] = ("downtown",)) -> "Topology":
+        """rows x cols grid at Davis block spacing, tiled into len(districts)
+        rectangular districts (row-major from the south-west)."""
+        districts = list(districts) or ["downtown"]
+        k = len(districts)
+        tiles_c = math.ceil(math.sqrt(k))
+        tiles_r = math.ceil(k / tiles_c)
+        rects = []
+        for j, zone in enumerate(districts):
+            tr, tc = divmod(j, tiles_c)
+            # The last district also takes any unused tiles in its tile row
+            tc_end = tiles_c if j == k - 1 else tc + 1
+            rects.append((
+                zone,
+                rows * tr // tiles_r, rows * (tr + 1) // tiles_r,
+                cols * tc // tiles_c, cols * tc_end // tiles_c,
+            ))
+        return cls(
+            rows, cols, DAVIS_GRID["anchor"], DAVIS_GRID["north"], DAVIS_GRID["east"],
+            districts=rects, default_zone=districts[0], name=f"{rows}x{cols}",
+        )
+
+    def __getstate__(self) -> dict:
+        # Pickle (e.g. to a shard process) the definition only; the tables
+        # rebuild lazily on the other side
+        cls = type(self)
+        return {k: v for k, v in self.__dict__.items() if not isinstance(getattr(cls, k, None), cached_property)}
+
+    # --- table (built on first use) ---
+
+    @cached_property
+    def zones(self) -> list[str]:
+        zones = [self.default_zone]
+        for zone, *_ in self.districts:
+            if zone not in zones:
+                zones.append(zone)
+        return zones
+
+    @cached_property
+    def row(self) -> array:
+        """Row of each intersection."""
+        out = array("I")
+        for r in range(self.rows):
+            out.extend(array("I", [r]) * self.cols)
+        return out
+
+    @cached_property
+    def col(self) -> array:
+        """Column of each intersection."""
+        return array("I", range(self.cols)) * self.rows
+
+    @cached_property
+    def zone(self) -> array:
+        """Index into `zones` of each intersection."""
+        out = array("H", [0]) * self.n_intersections
+        for zone, r0, r1, c0, c1 in self.districts:
+            c0, c1 = max(0, c0), min(self.cols, c1)
+            if c1 <= c0:
+                continue
+            fill = array("H", [self.zones.index(zone)]) * (c1 - c0)
+            for r in range(max(0, r0), min(self.rows, r1)):
+                out[r * self.cols + c0:r * self.cols + c1] = fill
+        return out
+
+    @cached_property
+    def _latlng(self) -> tuple[array, array]:
+        lat, lng = array("d"), array("d")
+        a_lat, a_lng = self.anchor
+        n_lat, n_lng = self.north
+        e_lat, e_lng = self.east
+        for r in range(self.rows):
+            for c in range(self.cols):
+                clat = round(a_lat + r * n_lat + c * e_lat, 6)
+                clng = round(a_lng + r * n_lng + c * e_lng, 6)
+                for _, dlat, dlng in _OFFSETS:
+                    lat.append(round(clat + dlat, 4))
+                    lng.append(round(clng + dlng, 4))
+        return lat, lng
+
+    @property
+    def lat(self) -> array:
+        return self._latlng[0]
+
+    @property
+    def lng(self) -> array:
+        return self._latlng[1]
+
+    # --- ids and names (computed, not stored) ---
+
+    def node_id(self, i: int) -> str:
+        return f"node_{i + 1:0{self._id_width}d}"
+
+    def node_index(self, node_id: str) -> Optional[int]:
+        """Inverse of node_id(); None for ids that aren't on this grid."""
+        try:
+            i = int(node_id.removeprefix("node_")) - 1
+        except ValueError:
+            return None
+        return i if 0 <= i < self.n_nodes and self.node_id(i) == node_id else None
+
+    def intersection_name(self, k: int) -> str:
+        r, c = divmod(k, self.cols)
+        row = self.row_labels[r] if self.row_labels else f"R{r}"
+        col = self.col_labels[c] if self.col_labels else f"C{c}"
+        return f"{row} & {col}"
+
+    def node_name(self, i: int) -> str:
+        return f"{self.intersection_name(i // CORNERS)} — {CORNER_NAMES[i % CORNERS]}"
+
+    def zone_name(self, k: int) -> str:
+        """Zone of intersection k."""
+        return self.zones[self.zone[k]]
+
+
+@lru_cache(maxsize=1)
+def default_topology() -> Topology:
+    """The server's main grid: GRID_FILE if set, else downtown Davis."""
+    if GRID_FILE:
+        return Topology.load(GRID_FILE)
+    return Topology.from_definition(DAVIS_GRID)
+
+
+@lru_cache(maxsize=64)
+def generated(rows: int, cols: int, districts: tuple[str, ...] = ("downtown",)) -> Topology:
+    """Shared generated topology, so instances on the same grid share one table."""
+    return Topology.generate(rows, cols, districts)
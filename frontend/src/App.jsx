@@ -11,7 +11,7 @@ import TopRiskList from './components/TopRiskList'
 import AlertPanel from './components/AlertPanel'
 import UserPage from './components/UserPage'
 import DashboardUserInsights from './components/DashboardUserInsights'
-import { clearAlerts } from './api'
+import { clearAlerts, registerSubscriber, unregisterSubscriber } from './api'
 import {
   computeProfile,
   createDefaultAnswers,
@@ -54,9 +54,11 @@ const sidebarStyle = {
 
 const ANSWERS_STORAGE_KEY = 'davis-user-answers-v1'
 const MESSAGES_STORAGE_KEY = 'davis-user-messages-v1'
+const SUBSCRIBE_DEBOUNCE_MS = 500
 
 export default function App() {
-  const { data, connected } = useWebSocket()
+  const [subscription, setSubscription] = useState(null)
+  const { data, connected, personalAlerts } = useWebSocket(subscription)
   const [pathname, setPathname] = useState(window.location.pathname)
   const [heatThreshold, setHeatThreshold] = useState(95)
   const [clearingAlerts, setClearingAlerts] = useState(false)
@@ -118,6 +120,43 @@ export default function App() {
     setAlertsOverride(null)
   }, [data?.tick])
 
+  // Register the completed profile server-side so personal alerts are pushed.
+  // Debounced, so dragging the threshold slider registers once it settles.
+  // Closing the tab unregisters too; the server also drops idle subscribers.
+  const { unanswered, personalHeat, personalFog } = profile
+  useEffect(() => {
+    if (unanswered) return
+    let sub = null
+    let cancelled = false
+    const timer = setTimeout(() => {
+      registerSubscriber({
+        heat_weight: personalHeat,
+        fog_weight: personalFog,
+        heat_threshold_f: heatThreshold,
+      })
+        .then((result) => {
+          sub = result?.subscriber?.id ? { id: result.subscriber.id, token: result.token } : null
+          if (cancelled && sub) unregisterSubscriber(sub.id, sub.token).catch(() => {})
+          else setSubscription(sub)
+        })
+        .catch(() => {})
+    }, SUBSCRIBE_DEBOUNCE_MS)
+    const onPageHide = (event) => {
+      // A page kept in the back/forward cache may come back; leave it to expire
+      if (event.persisted) return
+      if (sub) unregisterSubscriber(sub.id, sub.token, { keepalive: true }).catch(() => {})
+      sub = null
+    }
+    window.addEventListener('pagehide', onPageHide)
+    return () => {
+      cancelled = true
+      clearTimeout(timer)
+      window.removeEventListener('pagehide', onPageHide)
+      setSubscription(null)
+      if (sub) unregisterSubscriber(sub.id, sub.token).catch(() => {})
+    }
+  }, [unanswered, personalHeat, personalFog, heatThreshold])
+
   const navigate = (path) => {
     if (window.location.pathname === path) return
     window.history.pushState({}, '', path)
@@ -233,6 +272,7 @@ export default function App() {
               <ThresholdControls heatThreshold={heatThreshold} setHeatThreshold={setHeatThreshold} />
               <SorcererPanel atmospheric={atmospheric} />
               <TopRiskList risks={risks} />
+              {personalAlerts.length ? <AlertPanel title="Personal Alerts" alerts={personalAlerts} /> : null}
               <AlertPanel alerts={alerts} onClear={handleClearAlerts} clearing={clearingAlerts} />
             </Stack>
           </div>
@@ -39,3 +39,35 @@ export async function setScenario(preset) {
   const res = await fetch(`${BASE}/api/scenario/${preset}`, { method: 'POST' })
   return res.json()
 }
+
+// Server-Sent Events stream of full snapshots; returns a close function.
+// Used while the WebSocket is down; EventSource resumes via Last-Event-ID.
+export function openSnapshotStream(onSnapshot) {
+  const source = new EventSource(`${BASE}/api/stream`)
+  source.addEventListener('tick', (event) => {
+    try {
+      onSnapshot(JSON.parse(event.data))
+    } catch {}
+  })
+  return () => source.close()
+}
+
+// Server-side personal alerts: register profile weights + thresholds, then
+// open the WebSocket with ?subscriber=<id>&token=<token> to receive pushes.
+export async function registerSubscriber(profile) {
+  const res = await fetch(`${BASE}/api/subscribers`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(profile),
+  })
+  return res.json()
+}
+
+// keepalive lets the request outlive the page (used when the tab closes)
+export async function unregisterSubscriber(id, token, { keepalive = false } = {}) {
+  const res = await fetch(`${BASE}/api/subscribers/${id}?token=${encodeURIComponent(token)}`, {
+    method: 'DELETE',
+    keepalive,
+  })
+  return res.json()
+}
@@ -7,7 +7,7 @@ const severityColor = {
   emergency: 'red',
 }
 
-export default function AlertPanel({ alerts, onClear, clearing }) {
+export default function AlertPanel({ alerts, onClear, clearing, title = 'Alerts' }) {
   if (!alerts || alerts.length === 0) {
     return (
       <Card padding="sm" radius="md" style={{ background: '#1a1b1e' }}>
@@ -26,7 +26,7 @@ export default function AlertPanel({ alerts, onClear, clearing }) {
   return (
     <Card padding="sm" radius="md" style={{ background: '#1a1b1e', maxHeight: 250, overflowY: 'auto' }}>
       <Group justify="space-between" mb="xs">
-        <Text fw={600} size="sm">Alerts</Text>
+        <Text fw={600} size="sm">{title}</Text>
         {onClear ? (
           <Button
             size="compact-xs"
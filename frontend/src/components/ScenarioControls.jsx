@@ -8,6 +8,7 @@ const PRESETS = [
   { id: 'heat_wave', label: 'Heat Wave', color: 'red' },
   { id: 'light_fog', label: 'Light Fog', color: 'gray' },
   { id: 'dense_tule_fog', label: 'Dense Tule Fog', color: 'violet' },
+  { id: 'replay', label: 'Replay Log', color: 'indigo' },
 ]
 
 export default function ScenarioControls({ activeScenario }) {
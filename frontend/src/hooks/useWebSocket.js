@@ -1,40 +1,75 @@
 import { useEffect, useRef, useState, useCallback } from 'react'
+import { openSnapshotStream } from '../api'
 
-export function useWebSocket() {
+export function useWebSocket(subscription = null) {
   const [data, setData] = useState(null)
+  const [personalAlerts, setPersonalAlerts] = useState([])
   const [connected, setConnected] = useState(false)
   const wsRef = useRef(null)
   const reconnectTimer = useRef(null)
+  const closeStream = useRef(null)
+
+  const stopStream = () => {
+    if (closeStream.current) closeStream.current()
+    closeStream.current = null
+  }
 
   const connect = useCallback(() => {
     const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:'
-    const wsUrl = `${protocol}//${window.location.host}/ws/live`
+    const query = subscription
+      ? `?subscriber=${encodeURIComponent(subscription.id)}&token=${encodeURIComponent(subscription.token)}`
+      : ''
+    const wsUrl = `${protocol}//${window.location.host}/ws/live${query}`
     const ws = new WebSocket(wsUrl)
     wsRef.current = ws
 
-    ws.onopen = () => setConnected(true)
+    ws.onopen = () => {
+      setConnected(true)
+      stopStream()
+    }
 
     ws.onmessage = (event) => {
       try {
-        setData(JSON.parse(event.data))
+        const msg = JSON.parse(event.data)
+        if (msg.type === 'personal_alerts') {
+          // Merge by intersection + hazard; resolved alerts drop out
+          setPersonalAlerts((prev) => {
+            const byKey = new Map(prev.map((a) => [`${a.node_id}:${a.hazard}`, a]))
+            for (const a of msg.alerts) {
+              if (a.active) byKey.set(`${a.node_id}:${a.hazard}`, a)
+              else byKey.delete(`${a.node_id}:${a.hazard}`)
+            }
+            return [...byKey.values()]
+          })
+        } else {
+          setData(msg)
+        }
       } catch {}
     }
 
     ws.onclose = () => {
       setConnected(false)
-      reconnectTimer.current = setTimeout(connect, 2000)
+      if (wsRef.current === ws) {
+        // Keep the map live over SSE until the WebSocket is back
+        if (!closeStream.current) closeStream.current = openSnapshotStream(setData)
+        reconnectTimer.current = setTimeout(connect, 2000)
+      }
     }
 
     ws.onerror = () => ws.close()
-  }, [])
+  }, [subscription])
 
   useEffect(() => {
+    setPersonalAlerts([])
     connect()
     return () => {
-      if (wsRef.current) wsRef.current.close()
+      const ws = wsRef.current
+      wsRef.current = null
+      if (ws) ws.close()
+      stopStream()
       if (reconnectTimer.current) clearTimeout(reconnectTimer.current)
     }
   }, [connect])
 
-  return { data, connected }
+  return { data, connected, personalAlerts }
 }